@@ -0,0 +1,191 @@
+import json
+import os
+import numpy as np
+
+# Online statistics : Welford mean / variance, element-wise over arrays (NaN values are skipped)
+class RunningStatistics:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        values = np.where(valid, values, 0.0)
+        self.count = self.count + valid
+        delta = values - self.mean
+        self.mean = self.mean + np.where(valid, delta / np.maximum(self.count, 1), 0.0)
+        self.m2 = self.m2 + np.where(valid, delta * (values - self.mean), 0.0)
+        self.min = np.where(valid, np.minimum(self.min, values), self.min)
+        self.max = np.where(valid, np.maximum(self.max, values), self.max)
+
+    def variance(self):
+        return np.where(self.count > 0, self.m2 / np.maximum(self.count, 1), np.nan)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+# Streaming quantile : P-square algorithm (Jain & Chlamtac), five markers whatever the number of values
+class StreamingQuantile:
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = np.arange(5, dtype=float)
+        self.desired = np.array([0, 2 * p, 4 * p, 2 + 2 * p, 4])
+        self.increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def update(self, value):
+        value = float(value)
+        if len(self.heights) < 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+        q, n = self.heights, self.positions
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= value < q[i + 1])
+        n[k + 1:] += 1
+        self.desired += self.increments
+
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = np.sign(d)
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                                + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    j = i + int(d)
+                    q[i] = q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+                n[i] += d
+
+    def value(self):
+        if not self.heights:
+            return np.nan
+        if len(self.heights) < 5:
+            return float(np.quantile(self.heights, self.p))
+        return float(self.heights[2])
+
+class RunStatistics:
+    # Statistics of the best fitness and of the fitness curves over runs, updated one run at a time
+    # Quartiles are exact up to EXACT_RUNS runs (best fitness kept in memory), P-square estimates beyond
+    QUANTILES = (0.25, 0.5, 0.75)
+    EXACT_RUNS = 100000
+
+    def __init__(self):
+        self.best_fitness = RunningStatistics()
+        self.quantiles = {p: StreamingQuantile(p) for p in self.QUANTILES}
+        self.values = []
+        self.fitness_curves = RunningStatistics()
+
+    def update(self, best_fitness, fitness_curve=None):
+        self.best_fitness.update(best_fitness)
+        for quantile in self.quantiles.values():
+            quantile.update(best_fitness)
+        if self.values is not None:
+            self.values.append(float(best_fitness))
+            if len(self.values) > self.EXACT_RUNS:
+                self.values = None
+        if fitness_curve is not None:
+            self.fitness_curves.update(fitness_curve)
+
+    def summary(self):
+        exact = self.values is not None and len(self.values) > 0
+        if exact:
+            q1, median, q3 = (float(value) for value in np.quantile(self.values, self.QUANTILES))
+        else:
+            q1, median, q3 = (self.quantiles[p].value() for p in self.QUANTILES)
+        return {'runs': int(self.best_fitness.count), 'mean': float(self.best_fitness.mean), 'std': float(self.best_fitness.std()),
+                'min': float(self.best_fitness.min), 'max': float(self.best_fitness.max),
+                'median': median, 'q1': q1, 'q3': q3, 'exact_quantiles': exact}
+
+# Run archive : a JSON header followed by fixed-size binary records (one per run), readable with a memory map
+# Records : run index, best fitness, number of iterations, best position, fitness curve (padded with NaN)
+class RunArchive:
+    MAGIC = b'RUNARCH1'
+    ALIGNMENT = 64
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{path} is not a run archive")
+            self.header_size = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+            self.header = json.loads(f.read(self.header_size - len(self.MAGIC) - 8).decode())
+        self.dtype = self.record_dtype(self.header['num_dimensions'], self.header['num_iterations'])
+        self.file = None
+        self.statistics = None
+
+    @staticmethod
+    def record_dtype(num_dimensions, num_iterations):
+        return np.dtype([('run', '<i8'), ('best_fitness', '<f8'), ('iterations', '<i8'),
+                         ('best_position', '<f8', (num_dimensions,)), ('fitness_curve', '<f8', (num_iterations,))])
+
+    @classmethod
+    def create(cls, path, num_dimensions, num_iterations, parameters=None, seed=None):
+        # Parameters are stored as text, the seed of a run is (master seed, run index) as in runner.run_seeds
+        header = {'num_dimensions': num_dimensions, 'num_iterations': num_iterations, 'seed': None if seed is None else str(seed),
+                  'parameters': {key: str(value) for key, value in (parameters or {}).items()}}
+        header = json.dumps(header).encode()
+        header_size = -(-(len(cls.MAGIC) + 8 + len(header)) // cls.ALIGNMENT) * cls.ALIGNMENT
+        with open(path, 'wb') as f:
+            f.write(cls.MAGIC)
+            f.write(np.array(header_size, dtype='<u8').tobytes())
+            f.write(header.ljust(header_size - len(cls.MAGIC) - 8))
+        archive = cls(path)
+        archive.statistics = RunStatistics()
+        return archive
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - self.header_size) // self.dtype.itemsize
+
+    def append(self, run, best_position, best_fitness, fitness_curve):
+        record = np.zeros(1, dtype=self.dtype)
+        record['run'] = run
+        record['best_fitness'] = best_fitness
+        record['best_position'] = best_position
+        record['fitness_curve'] = np.nan
+        if fitness_curve is not None:
+            fitness_curve = np.asarray(fitness_curve, dtype=float)[:self.header['num_iterations']]
+            record['iterations'] = len(fitness_curve)
+            record['fitness_curve'][0, :len(fitness_curve)] = fitness_curve
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        self.file.write(record.tobytes())
+        self.file.flush()
+        if self.statistics is not None:
+            self.statistics.update(best_fitness, record['fitness_curve'][0])
+
+    def records(self):
+        # Memory-mapped records, nothing is loaded until it is read
+        return np.memmap(self.path, dtype=self.dtype, mode='r', offset=self.header_size, shape=(len(self),))
+
+    def aggregate(self, chunk_size=1024):
+        # Statistics of all the archived runs, reading the archive one chunk of records at a time
+        statistics = RunStatistics()
+        records = self.records()
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            for best_fitness, fitness_curve in zip(chunk['best_fitness'], chunk['fitness_curve']):
+                statistics.update(best_fitness, fitness_curve)
+        return statistics
@@ -0,0 +1,34 @@
+import asyncio
+import numpy as np
+
+from objectives import evaluate_batch
+
+# Asynchronous driver of the ask / tell sessions (`Pso.session`, `De.session`, `Abc.session`) :
+# `concurrency` evaluations of an async objective function are kept in flight, results are told as they arrive
+async def optimize_async(session, objective_function, max_evaluations, concurrency=8):
+    tickets = {}
+    asked = 0
+    while asked < max_evaluations or tickets:
+        while asked < max_evaluations and len(tickets) < concurrency:
+            ticket, position = session.ask()
+            tickets[asyncio.ensure_future(objective_function(position))] = ticket
+            asked += 1
+        done, _ = await asyncio.wait(tickets, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            session.tell(tickets.pop(task), task.result())
+    return session.result()
+
+def run_async(session, objective_function, max_evaluations, concurrency=8):
+    return asyncio.run(optimize_async(session, objective_function, max_evaluations, concurrency))
+
+class SimulatedObjective:
+    # Local async stand-in for a remote simulator : evaluates `objective_function` after a random latency (in seconds)
+    def __init__(self, objective_function, min_latency=0.0, max_latency=0.01, rng=None):
+        self.objective_function = objective_function
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    async def __call__(self, position):
+        await asyncio.sleep(self.rng.uniform(self.min_latency, self.max_latency))
+        return float(evaluate_batch(self.objective_function, np.asarray(position)[None, :])[0])
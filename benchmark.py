@@ -0,0 +1,163 @@
+# Benchmark suite : PSO, DE and ABC on standard test functions and on the rectangle use case
+# Usage : python benchmark.py --runs 10 --output benchmark.json [--compare previous_benchmark.json]
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+
+from methods import Pso, De, Abc
+from objectives import batch_objective
+from rectangle import NumpyRectangleObjective, RectangleObjective, POLY
+from runner import run_many
+from termination import MaxEvaluations
+
+# Test functions, negated since the optimizers maximize (optimum 0 at the global minimum)
+@batch_objective
+def sphere(positions):
+    return -np.sum(positions ** 2, axis=1)
+
+@batch_objective
+def rastrigin(positions):
+    return -(10 * positions.shape[1] + np.sum(positions ** 2 - 10 * np.cos(2 * np.pi * positions), axis=1))
+
+@batch_objective
+def rosenbrock(positions):
+    return -np.sum(100 * (positions[:, 1:] - positions[:, :-1] ** 2) ** 2 + (1 - positions[:, :-1]) ** 2, axis=1)
+
+@batch_objective
+def ackley(positions):
+    dimensions = positions.shape[1]
+    return -(-20 * np.exp(-0.2 * np.sqrt(np.sum(positions ** 2, axis=1) / dimensions))
+             - np.exp(np.sum(np.cos(2 * np.pi * positions), axis=1) / dimensions) + 20 + np.e)
+
+# Name : (objective function, bounds of every dimension, target fitness)
+FUNCTIONS = {
+    'sphere': (sphere, (-5.12, 5.12), -1e-4),
+    'rastrigin': (rastrigin, (-5.12, 5.12), -1.0),
+    'rosenbrock': (rosenbrock, (-5, 10), -1.0),
+    'ackley': (ackley, (-32.768, 32.768), -1e-2),
+}
+RECTANGLE_BOUNDS = [(-500, 500)] * 4 + [(0, 360)]
+RECTANGLE_TARGET = 25000
+# Rectangle use case : objective used by main.py (NumPy clipping) and Shapely reference implementation
+RECTANGLE_OBJECTIVES = {'rectangle': NumpyRectangleObjective, 'rectangle-shapely': RectangleObjective}
+PROBLEMS = list(FUNCTIONS) + list(RECTANGLE_OBJECTIVES)
+
+def problems(names, dimensions):
+    # Yields (problem, num_dimensions, objective function, bounds, target)
+    for name in names:
+        if name in RECTANGLE_OBJECTIVES:
+            yield name, 5, RECTANGLE_OBJECTIVES[name](POLY), RECTANGLE_BOUNDS, RECTANGLE_TARGET
+            continue
+        objective_function, bound, target = FUNCTIONS[name]
+        for num_dimensions in dimensions:
+            yield name, num_dimensions, objective_function, [bound] * num_dimensions, target
+
+def optimizer_parameters(optimizer, objective_function, bounds, num_dimensions, population, max_evaluations):
+    # Same coefficients as main.py, the runs stop on an equal evaluation budget
+    termination = MaxEvaluations(max_evaluations)
+    num_iterations = max_evaluations // population + 1
+    if optimizer == 'PSO':
+        return Pso(), Pso.Parameters(objective_function, bounds, num_dimensions, population, num_iterations, 0.5, 1.5, 1.5,
+                                     history='fitness', termination=termination)
+    if optimizer == 'DE':
+        return De(), De.Parameters(objective_function, bounds, num_dimensions, population, 0.5, 0.7, num_iterations,
+                                   history='fitness', termination=termination)
+    if optimizer == 'ABC':
+        return Abc(), Abc.Parameters(objective_function, bounds, num_dimensions, population, population, population, 10, num_iterations,
+                                     history='fitness', termination=termination)
+    raise ValueError(f"Unknown optimizer {optimizer!r}")
+
+def summary(values):
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return None
+    return {'mean': float(np.mean(values)), 'median': float(np.median(values)), 'std': float(np.std(values)),
+            'min': float(np.min(values)), 'max': float(np.max(values))}
+
+def benchmark(optimizer, problem, num_dimensions, objective_function, bounds, target, runs, population, max_evaluations, seed, max_workers):
+    optimizer_instance, params = optimizer_parameters(optimizer, objective_function, bounds, num_dimensions, population, max_evaluations)
+    results = [None] * runs
+    for run, result in run_many(optimizer_instance, optimizer, params, runs, seed, max_workers):
+        results[run] = result
+
+    final_fitness = [result.best_fitness for result in results]
+    evaluations_per_second = [result.evaluations / result.elapsed for result in results]
+    time_per_iteration = [result.elapsed / result.iterations for result in results]
+
+    # Time to target estimated from the first iteration reaching the target
+    time_to_target = []
+    for result, seconds_per_iteration in zip(results, time_per_iteration):
+        reached = np.flatnonzero(result.best_fitness_progress >= target)
+        if len(reached):
+            time_to_target.append((reached[0] + 1) * seconds_per_iteration)
+
+    return {
+        'optimizer': optimizer, 'problem': problem, 'num_dimensions': num_dimensions, 'runs': runs,
+        'population': population, 'max_evaluations': max_evaluations, 'target': target,
+        'evaluations_per_second': summary(evaluations_per_second),
+        'wall_time_per_iteration': summary(time_per_iteration),
+        'success_rate': len(time_to_target) / runs,
+        'time_to_target': summary(time_to_target),
+        'final_fitness': dict(summary(final_fitness), values=final_fitness),
+    }
+
+def git_commit():
+    try:
+        # Commit of the benchmarked code, whatever the current directory
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, previous):
+    # Speedup (evaluations per second) and final fitness change of each benchmark against a previous report
+    key = lambda entry: (entry['optimizer'], entry['problem'], entry['num_dimensions'])
+    previous_results = {key(entry): entry for entry in previous['results']}
+    print(f"{'Benchmark':<28}{'Speedup':>10}{'Median fitness':>20}{'Previous':>16}")
+    for entry in current['results']:
+        if key(entry) not in previous_results:
+            continue
+        other = previous_results[key(entry)]
+        speedup = entry['evaluations_per_second']['median'] / other['evaluations_per_second']['median']
+        name = f"{entry['optimizer']} {entry['problem']} {entry['num_dimensions']}D"
+        print(f"{name:<28}{speedup:>9.2f}x{entry['final_fitness']['median']:>20.6g}{other['final_fitness']['median']:>16.6g}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PSO, DE and ABC on standard test functions and the rectangle use case")
+    parser.add_argument('--optimizers', nargs='+', default=['PSO', 'DE', 'ABC'], choices=['PSO', 'DE', 'ABC'])
+    parser.add_argument('--problems', nargs='+', default=PROBLEMS, choices=PROBLEMS)
+    parser.add_argument('--dimensions', nargs='+', type=int, default=[2, 10, 30])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--population', type=int, default=30)
+    parser.add_argument('--evaluations', type=int, default=30000, help="Evaluation budget of every run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (1 keeps the timings undisturbed)")
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--compare', help="Previous JSON report to compare with")
+    args = parser.parse_args(argv)
+
+    report = {
+        'metadata': {'commit': git_commit(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                     'numpy': np.__version__, 'machine': platform.machine(), 'seed': args.seed},
+        'results': [],
+    }
+    for problem, num_dimensions, objective_function, bounds, target in problems(args.problems, args.dimensions):
+        for optimizer in args.optimizers:
+            entry = benchmark(optimizer, problem, num_dimensions, objective_function, bounds, target, args.runs, args.population,
+                              args.evaluations, args.seed, args.workers)
+            report['results'].append(entry)
+            print(f"{optimizer:<4} {problem:<17}{num_dimensions:>3}D  {entry['evaluations_per_second']['median']:>12.0f} eval/s  "
+                  f"median fitness {entry['final_fitness']['median']:.6g}  success {entry['success_rate']:.0%}")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import numpy as np
+from collections import OrderedDict
+
+# Memoization of the objective function, positions closer than `tolerance` (per dimension) share the same entry
+class FitnessCache:
+    def __init__(self, maxsize=100000, tolerance=0.0):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.entries = OrderedDict()  # Least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def keys(self, positions):
+        positions = np.ascontiguousarray(positions, dtype=float)
+        if self.tolerance > 0:
+            positions = np.round(positions / self.tolerance).astype(np.int64)
+        return [position.tobytes() for position in positions]
+
+    def store(self, key, fitness):
+        self.entries[key] = fitness
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def evaluate(self, positions, evaluate_positions):
+        # Only the positions missing from the cache (once per key) are sent to `evaluate_positions`
+        fitness = np.empty(len(positions), dtype=float)
+        missing = OrderedDict()
+        for i, key in enumerate(self.keys(positions)):
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                fitness[i] = self.entries[key]
+                self.hits += 1
+            elif key in missing:
+                missing[key].append(i)
+                self.hits += 1
+            else:
+                missing[key] = [i]
+                self.misses += 1
+
+        if missing:
+            values = evaluate_positions(positions[[indices[0] for indices in missing.values()]])
+            for (key, indices), value in zip(missing.items(), values):
+                fitness[indices] = value
+                self.store(key, float(value))
+        return fitness
+
+    def statistics(self, since=None):
+        statistics = {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+        if since is not None:
+            statistics = {name: value - since[name] for name, value in statistics.items()}
+        lookups = statistics['hits'] + statistics['misses']
+        statistics['hit_rate'] = statistics['hits'] / lookups if lookups else 0.0
+        statistics['size'] = len(self.entries)
+        return statistics
+
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,58 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from objectives import evaluate_batch
+
+# Evaluators : evaluate all the candidates of a cycle / generation, serially or concurrently
+class SerialEvaluator:
+    def evaluate(self, objective_function, positions):
+        return evaluate_batch(objective_function, positions)
+
+    def close(self):
+        pass
+
+class PoolEvaluator:
+    executor_class = None
+
+    def __init__(self, max_workers=None, chunk_size=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self.chunk_size = chunk_size  # Positions sent to a worker at once, by default one chunk per worker
+        self.executor = None
+
+    def __getstate__(self):
+        # The pool itself stays in the process that created it
+        state = self.__dict__.copy()
+        state['executor'] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def chunks(self, positions):
+        chunk_size = self.chunk_size or max(1, -(-len(positions) // self.max_workers))
+        return [positions[i:i + chunk_size] for i in range(0, len(positions), chunk_size)]
+
+    def evaluate(self, objective_function, positions):
+        chunks = self.chunks(positions)
+        if len(chunks) <= 1:
+            return evaluate_batch(objective_function, positions)
+        if self.executor is None:
+            self.executor = self.executor_class(max_workers=self.max_workers)
+        return np.concatenate(list(self.executor.map(evaluate_batch, [objective_function] * len(chunks), chunks)))
+
+class ThreadPoolEvaluator(PoolEvaluator):
+    # For objectives releasing the GIL (I/O, NumPy, Shapely, external simulators)
+    executor_class = ThreadPoolExecutor
+
+class ProcessPoolEvaluator(PoolEvaluator):
+    # For pure Python objectives, the objective function must be picklable
+    executor_class = ProcessPoolExecutor
@@ -0,0 +1,113 @@
+import multiprocessing
+import queue
+import traceback
+import numpy as np
+
+from methods import RunResult, evaluate
+
+# Island model : several populations (same or mixed algorithms) evolve in separate processes
+# and periodically send their best individuals to their neighbours
+TOPOLOGIES = ('ring', 'full')
+
+def neighbours(island, num_islands, topology):
+    if topology == 'ring':
+        return [(island + 1) % num_islands] if num_islands > 1 else []
+    if topology == 'full':
+        return [other for other in range(num_islands) if other != island]
+    raise ValueError(f"Unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+
+def evolve_island(island, optimizer_instance, params, seed, num_generations, migration_interval, migration_size, topology,
+                  inboxes, results):
+    # Errors are sent to the parent process, which stops the other islands (otherwise waiting for migrants forever)
+    # as a traceback text, since exceptions are not all picklable
+    try:
+        results.put((island, None, evolve(island, optimizer_instance, params, seed, num_generations, migration_interval, migration_size,
+                                          topology, inboxes)))
+    except Exception:
+        results.put((island, traceback.format_exc(), None))
+
+def evolve(island, optimizer_instance, params, seed, num_generations, migration_interval, migration_size, topology, inboxes):
+    session = optimizer_instance.session(params, np.random.default_rng(seed))
+    num_slots = len(session.fitness)
+    num_islands = len(inboxes)
+    targets = neighbours(island, num_islands, topology)
+    num_sources = sum(island in neighbours(other, num_islands, topology) for other in range(num_islands))
+    received = {}  # Migration : migrants received in advance from faster islands
+    best_position_progress = np.empty((num_generations, params.num_dimensions))
+    best_fitness_progress = np.empty(num_generations)
+
+    for generation in range(num_generations):
+        # One generation : every slot of the population is asked, evaluated as a batch and told
+        tickets, positions = zip(*(session.ask() for _ in range(num_slots)))
+        for ticket, fitness in zip(tickets, evaluate(params, np.array(positions))):
+            session.tell(ticket, fitness)
+        best_position_progress[generation] = session.best_position
+        best_fitness_progress[generation] = session.best_fitness
+
+        if (generation + 1) % migration_interval == 0 and generation + 1 < num_generations:
+            migration = (generation + 1) // migration_interval
+            migrants = session.top(migration_size)
+            for target in targets:
+                inboxes[target].put((migration, island, migrants))
+            while len(received.get(migration, [])) < num_sources:
+                message_migration, sender, message = inboxes[island].get()
+                received.setdefault(message_migration, []).append((sender, message))
+            # Injected in the order of the senders, whatever the order of arrival, for reproducible runs
+            for _, (positions, fitness) in sorted(received.pop(migration, []), key=lambda message: message[0]):
+                session.inject(positions, fitness)
+
+    return (island, session.best_position.tolist(), session.best_fitness, best_position_progress, best_fitness_progress,
+            session.evaluations)
+
+def collect_results(processes, results, poll_interval=1.0):
+    # Results of all the islands, the first error (or island process exiting without result) stops the other islands
+    island_results = {}
+    exited = set()  # Islands found exited without result, given one more poll interval for their result to arrive
+    try:
+        while len(island_results) < len(processes):
+            try:
+                island, error, result = results.get(timeout=poll_interval)
+            except queue.Empty:
+                for island, process in enumerate(processes):
+                    if island not in island_results and process.exitcode is not None:
+                        if island in exited:
+                            raise RuntimeError(f"Island {island} exited with code {process.exitcode} without result")
+                        exited.add(island)
+                continue
+            if error is not None:
+                raise RuntimeError(f"Island {island} failed:\n{error}")
+            island_results[island] = result
+    except BaseException:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+    return [island_results[island] for island in range(len(processes))]
+
+def run_islands(islands, num_generations, migration_interval=10, migration_size=2, topology='ring', seed=None):
+    # islands : list of (optimizer instance, parameters), e.g. [(De(), de_params), (Pso(), pso_params)]
+    neighbours(0, len(islands), topology)
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in islands]
+    results = context.Queue()
+    seeds = np.random.SeedSequence(seed).spawn(len(islands))
+    processes = [context.Process(target=evolve_island, args=(island, optimizer_instance, params, seeds[island], num_generations,
+                                                             migration_interval, migration_size, topology, inboxes, results))
+                 for island, (optimizer_instance, params) in enumerate(islands)]
+    for process in processes:
+        process.start()
+    island_results = collect_results(processes, results)
+
+    # Merged output : best island at each generation
+    position_progress = np.stack([result[3] for result in island_results])
+    fitness_progress = np.stack([result[4] for result in island_results])
+    best_islands = np.argmax(fitness_progress, axis=0)
+    generations = np.arange(num_generations)
+    best = int(best_islands[-1])
+    return RunResult(island_results[best][1], island_results[best][2], position_progress[best_islands, generations],
+                     fitness_progress[best_islands, generations], evaluations=sum(result[5] for result in island_results),
+                     iterations=num_generations, stop_reason='max_iterations',
+                     islands=[{'best_position': result[1], 'best_fitness': result[2]} for result in island_results])
@@ -1,16 +1,24 @@
 # General librairies
+# Plotting (matplotlib) and geometry (shapely) librairies are imported when needed only
 from methods import Pso, De, Abc
-import matplotlib.pyplot as plt
+from runner import run_many
+from archive import RunArchive
+from termination import MaxEvaluations
+import argparse
 import numpy as np
 import os
 import shutil
 
 # Usecase librairies
 import math
-from matplotlib.patches import Polygon as MatplotlibPolygon
-import matplotlib.animation as animation
-from shapely.geometry import Polygon
-from shapely import intersects,intersection,normalize
+
+# UseCase : find the rectangle with the largest area that fits a polygon
+INF = -500
+SUP = 500
+MIN_ANGLE = 0
+MAX_ANGLE = 360
+POLY = ((50, 150), (200, 50), (350, 150), (350, 300), (250, 300), (200, 250), (150, 350), (100, 250), (100, 200))
+OPTIMIZERS = ('PSO', 'DE', 'ABC')
 
 def empty_directory(directory):
     for root, dirs, files in os.walk(directory):
@@ -22,105 +30,109 @@ def empty_directory(directory):
             dir_path = os.path.join(root, dir)
             shutil.rmtree(dir_path)
 
-empty_directory("KPI/PSO")
-empty_directory("KPI/DE")
-empty_directory("KPI/ABC")
-
-def plot_optimization_progress(params, optimizer, optimizer_instance):
-    
-    num_runs = 30
-    best_fitness_data = [] 
-    best_position_progress_data = []
-    best_fitness_progress_data = []
-    for run in range(num_runs):
-        if optimizer == 'PSO':
-            _, best_fitness, best_position_progress_run , best_fitness_progress_run = optimizer_instance.pso(params)
-        elif optimizer == 'DE':
-            _, best_fitness, best_position_progress_run , best_fitness_progress_run = optimizer_instance.de(params)
-        elif optimizer == 'ABC':
-            _, best_fitness, best_position_progress_run , best_fitness_progress_run = optimizer_instance.abc(params)
-
-        best_fitness_data.append(best_fitness) 
-        best_position_progress_data.append(best_position_progress_run) 
-        best_fitness_progress_data.append(best_fitness_progress_run)
-    
+# Objective function (adapted to the usecase), reference implementation for a single position
+def objective_function(position):
+    from shapely.geometry import Polygon
+
+    poly = ((50, 150), (200, 50), (350, 150), (350, 300), (250, 300), (200, 250), (150, 350), (100, 250), (100, 200))
+
+    x, y = position[0], position[1]  # Point d'ancrage du rectangle
+    w = position[2]  # Largeur
+    h = position[3]  # Hauteur
+    angle = position[4]  # Angle (en degrés)
+
+    # Conversion de l'angle en radians
+    theta = math.radians(angle)
+
+    corners = [(x, y)]  # Ajoutez le point d'ancrage comme premier coin
+
+    for i in range(3):
+        if i == 1:
+            d = w  # Utilisez la largeur pour le deuxième coin
+        else:
+            d = h  # Utilisez la hauteur pour les deux derniers coins
+
+        # Calculez les coordonnées du prochain coin en fonction de l'angle et de la distance
+        tmp_x = corners[-1][0] + d * math.cos(theta)
+        tmp_y = corners[-1][1] + d * math.sin(theta)
+
+        corners.append((tmp_x, tmp_y))
+
+        # Ajoutez 90 degrés à l'angle pour le prochain coin
+        theta += math.radians(90)
+
+    # Créez un Polygon à partir des coins du rectangle
+    r = Polygon(corners)
+
+    # Créez un Polygon à partir des coordonnées du polygon
+    p = Polygon(poly)
+
+    if p.contains(r):
+        res_area = r.area
+        # print(f"Aire rectangle (contains) = {res_area}")
+    elif p.intersects(r):
+        intersection_area = p.intersection(r).area
+        total_area = r.area
+        outside_area = total_area - intersection_area
+        res_area = 0 - outside_area
+        # print(f"Aire rectangle (inter) = {res_area}")
+    else:
+        res_area = -10000
+        # print(f"Aire rectangle (out) = {res_area}")
+
+    return res_area
+
+def plot_optimization_progress(params, optimizer, optimizer_instance, num_runs=30, seed=None, max_workers=None, output_dir='.', headless=False):
+
+    if seed is None:
+        seed = np.random.SeedSequence().entropy  # Recorded to be able to reproduce the runs
+
     if optimizer == 'PSO':
-        num_iterations = list(range(1, params.num_cycles + 1))
+        num_iterations = params.num_cycles
     elif optimizer == 'DE':
-        num_iterations = list(range(1, params.max_generations + 1))
+        num_iterations = params.max_generations
     elif optimizer == 'ABC':
-        num_iterations = list(range(1, params.max_trials + 1))
-
-    best_fitness_index = np.argmax(best_fitness_data)
-    best_position_progress = best_position_progress_data[best_fitness_index]
-    best_fitness_progress = best_fitness_progress_data[best_fitness_index]
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.axis('equal')
-    ax.set_title(f'{optimizer} - Animation')
-    
-    def init():
-        pass
-
-    def draw(position, poly):
-        x, y = position[0], position[1]  # Point d'ancrage du rectangle
-        w = position[2]  # Largeur
-        h = position[3]  # Hauteur
-        angle = position[4]  # Angle (en degrés)
-
-        theta = math.radians(angle)
-
-        corners = [(x, y)] 
-        for i in range(3):
-            if i == 1:
-                d = w  
-            else:
-                d = h  
-
-            # Calculez les coordonnées du prochain coin en fonction de l'angle et de la distance
-            tmp_x = corners[-1][0] + d * math.cos(theta)
-            tmp_y = corners[-1][1] + d * math.sin(theta)
-
-            corners.append((tmp_x, tmp_y))
-
-            # Ajoutez 90 degrés à l'angle pour le prochain coin
-            theta += math.radians(90)
-
-        rect_polygon = MatplotlibPolygon(corners, fill=True, color="red", alpha=1)    
-        poly_polygon = MatplotlibPolygon(poly, fill=True, alpha=0.2)
-        ax.add_patch(rect_polygon)
-        ax.add_patch(poly_polygon)
-        ax.autoscale_view()
-
-    def update_draw(frame):
-        ax.clear()
-        ax.axis('equal')
-        ax.axis('off')
-        ax.set_title(f'{optimizer} - Best Run ')
-        draw(best_position_progress[frame], poly)
-        ax_fitness = ax.inset_axes([0, 0, 0.2, 0.2])
-        ax_fitness.plot(num_iterations[:frame+1], best_fitness_progress[:frame+1])
-        ax_fitness.set_xlabel('Iteration')
-        ax_fitness.set_ylabel('Fitness')
-
-    ani = animation.FuncAnimation(fig, update_draw, frames=len(best_position_progress), init_func=init, repeat=False, blit=False)
-    ani.save(f'Animation/{optimizer}/{str(optimizer).lower()}_best_run_animation.gif', writer='pillow', fps=10)  
-
-    # Crée un graphique en affichant les meilleures fitness en y et les runs en x
-    plt.figure()
-    plt.plot(list(range(1, num_runs + 1)), best_fitness_data)
-    plt.title(f"{optimizer} - Best Fitness across Runs")
-    plt.xlabel("Run")
-    plt.ylabel("Best Fitness")
-    plt.grid()
-    plt.savefig(f'KPI/{optimizer}/{str(optimizer).lower()}_progress_across_runs.png')  # Sauvegarde le graphique dans un dossier "kpi"
+        num_iterations = params.num_cycles
+
+    # Every run is appended to the archive as soon as it completes, only the history of the best run so far is kept
+    kpi_dir = os.path.join(output_dir, 'KPI', optimizer)
+    os.makedirs(kpi_dir, exist_ok=True)
+    param_dict = {key: getattr(params, key) for key in dir(params) if not key.startswith("__")}
+    archive = RunArchive.create(os.path.join(kpi_dir, f'{str(optimizer).lower()}_runs.bin'), params.num_dimensions, num_iterations, param_dict, seed)
+    best_run = None
+    with archive:
+        for run, (best_position, best_fitness, best_position_progress_run, best_fitness_progress_run) in run_many(optimizer_instance, optimizer, params, num_runs, seed, max_workers):
+            archive.append(run, best_position, best_fitness, best_fitness_progress_run)
+            # Ties go to the first run, whatever the order in which runs complete
+            if best_run is None or (best_fitness, -run) > (best_run_fitness, -best_run):
+                best_run, best_run_fitness = run, best_fitness
+                best_position_progress = best_position_progress_run
+                best_fitness_progress = best_fitness_progress_run
+    statistics = archive.statistics.summary()
+
+    if not headless:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        # Crée un graphique en affichant les meilleures fitness en y et les runs en x
+        records = archive.records()
+        best_fitness_data = np.empty(num_runs)
+        best_fitness_data[records['run']] = records['best_fitness']
+        plt.figure()
+        plt.plot(list(range(1, num_runs + 1)), best_fitness_data)
+        plt.title(f"{optimizer} - Best Fitness across Runs")
+        plt.xlabel("Run")
+        plt.ylabel("Best Fitness")
+        plt.grid()
+        plt.savefig(os.path.join(kpi_dir, f'{str(optimizer).lower()}_progress_across_runs.png'))  # Sauvegarde le graphique dans un dossier "kpi"
+        plt.close()
 
     # Génère un fichier texte avec les informations
-    with open(f'KPI/{optimizer}/{str(optimizer).lower()}_parameters_statistics.txt', 'w') as f:
+    with open(os.path.join(kpi_dir, f'{str(optimizer).lower()}_parameters_statistics.txt'), 'w') as f:
         f.write(f"#--------------------#\n")
 
         f.write(f"\n{optimizer} - Parameters\n\n")
-        param_dict = {key: getattr(params, key) for key in dir(params) if not key.startswith("__")}
         for param, value in param_dict.items():
             f.write(f"{param}: {value}\n")
 
@@ -128,111 +140,98 @@ def plot_optimization_progress(params, optimizer, optimizer_instance):
 
         f.write(f"\n{optimizer} - Statistics:\n\n")
         f.write(f"Runs: {num_runs}\n")
-        f.write(f"Mean Best Fitness: {np.mean(best_fitness_data)}\n")
-        f.write(f"Median Best Fitness: {np.median(best_fitness_data)}\n")
-        f.write(f"Standard Deviation: {np.std(best_fitness_data)}\n")
-        f.write(f"Minimum Best Fitness: {np.min(best_fitness_data)}\n")
-        f.write(f"Maximum Best Fitness: {np.max(best_fitness_data)}\n")
+        f.write(f"Seed: {seed}\n")
+        f.write(f"Mean Best Fitness: {statistics['mean']}\n")
+        f.write(f"Median Best Fitness{'' if statistics['exact_quantiles'] else ' (P-square estimate)'}: {statistics['median']}\n")
+        f.write(f"Standard Deviation: {statistics['std']}\n")
+        f.write(f"Minimum Best Fitness: {statistics['min']}\n")
+        f.write(f"Maximum Best Fitness: {statistics['max']}\n")
 
         f.write(f"\n#--------------------#n")
 
-if __name__ == "__main__":
-    # UseCase : find the rectangle with the largest area that fits a polygon
-    INF = -500
-    SUP = 500 
-    MIN_ANGLE = 0 
-    MAX_ANGLE = 360
-    poly = ((50, 150), (200, 50), (350, 150), (350, 300), (250, 300), (200, 250), (150, 350), (100, 250), (100, 200))
+    if headless:
+        return None
 
-    # Global parameters
-    bounds = []
-    for _ in range (4):
-        bounds.append((INF,SUP))
-    bounds.append((MIN_ANGLE,MAX_ANGLE))
-    num_dimensions = 5
+    # Animation of the best run, rendered later (possibly in parallel with the other optimizers)
+    animation_dir = os.path.join(output_dir, 'Animation', optimizer)
+    os.makedirs(animation_dir, exist_ok=True)
+    return {'optimizer': optimizer, 'best_position_progress': best_position_progress, 'best_fitness_progress': best_fitness_progress,
+            'path': os.path.join(animation_dir, f'{str(optimizer).lower()}_best_run_animation.gif')}
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Find the rectangle with the largest area that fits a polygon with PSO, DE and ABC")
+    parser.add_argument('--optimizers', nargs='+', default=list(OPTIMIZERS), choices=OPTIMIZERS)
+
+    # Runs : independent runs per optimizer, master seed (random by default) and number of worker processes (all the cores by default)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-evaluations', type=int, default=None, help="Evaluation budget of every run")
+    parser.add_argument('--output-dir', default='.', help="Directory where the KPI and Animation directories are written")
+    parser.add_argument('--headless', action='store_true', help="Only write the statistics files (no plots, no animations)")
+
+    # Animations : maximum number of frames (all by default) and decimation of the frames where the best position changed
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--decimation', type=int, default=1)
 
     # Parameters for PSO
-    num_particles = 30
-    num_cycles = 100
-    psi = 0.5 
-    c1 = 1.5  
-    c2 = 1.5 
+    parser.add_argument('--num-particles', type=int, default=30)
+    parser.add_argument('--num-cycles', type=int, default=100)
+    parser.add_argument('--psi', type=float, default=0.5)
+    parser.add_argument('--c1', type=float, default=1.5)
+    parser.add_argument('--c2', type=float, default=1.5)
 
     # Parameters for DE
-    num_population = 30
-    scaling_factor = 0.5 
-    crossover_rate = 0.7  
-    max_generations = 100  
+    parser.add_argument('--num-population', type=int, default=30)
+    parser.add_argument('--scaling-factor', type=float, default=0.5)
+    parser.add_argument('--crossover-rate', type=float, default=0.7)
+    parser.add_argument('--max-generations', type=int, default=100)
 
     # Parameters for ABC
-    num_employed_bees = 30
-    num_onlooker_bees = 30
-    num_scout_bees = 30
-    max_trials = 50
-
-    # Instance of class 
-    pso_optimizer = Pso()
-    de_optimizer = De()
-    abc_optimizer = Abc()
-
-    # Objective function (adapted to the usecase)
-    def objective_function(position):
-        poly = ((50, 150), (200, 50), (350, 150), (350, 300), (250, 300), (200, 250), (150, 350), (100, 250), (100, 200))
-
-        x, y = position[0], position[1]  # Point d'ancrage du rectangle
-        w = position[2]  # Largeur
-        h = position[3]  # Hauteur
-        angle = position[4]  # Angle (en degrés)
-
-        # Conversion de l'angle en radians
-        theta = math.radians(angle)
-
-        corners = [(x, y)]  # Ajoutez le point d'ancrage comme premier coin
-
-        for i in range(3):
-            if i == 1:
-                d = w  # Utilisez la largeur pour le deuxième coin
-            else:
-                d = h  # Utilisez la hauteur pour les deux derniers coins
-
-            # Calculez les coordonnées du prochain coin en fonction de l'angle et de la distance
-            tmp_x = corners[-1][0] + d * math.cos(theta)
-            tmp_y = corners[-1][1] + d * math.sin(theta)
-
-            corners.append((tmp_x, tmp_y))
-
-            # Ajoutez 90 degrés à l'angle pour le prochain coin
-            theta += math.radians(90)
-        
-        # Créez un Polygon à partir des coins du rectangle
-        r = Polygon(corners)
-
-        # Créez un Polygon à partir des coordonnées du polygon
-        p = Polygon(poly)
-
-        if p.contains(r):
-            res_area = r.area
-            # print(f"Aire rectangle (contains) = {res_area}")
-        elif p.intersects(r):
-            intersection_area = p.intersection(r).area
-            total_area = r.area
-            outside_area = total_area - intersection_area
-            res_area = 0 - outside_area
-            # print(f"Aire rectangle (inter) = {res_area}")
-        else:
-            res_area = -10000
-            # print(f"Aire rectangle (out) = {res_area}")
+    parser.add_argument('--num-employed-bees', type=int, default=30)
+    parser.add_argument('--num-onlooker-bees', type=int, default=30)
+    parser.add_argument('--num-scout-bees', type=int, default=30)
+    parser.add_argument('--max-trials', type=int, default=10, help="Unsuccessful trials before a food source is abandoned")
+    parser.add_argument('--abc-num-cycles', type=int, default=100)
+    return parser.parse_args(argv)
 
-        return res_area
+def main(argv=None):
+    args = parse_arguments(argv)
+    from rectangle import NumpyRectangleObjective
 
-    # Instance of Parameters
-    pso_params = pso_optimizer.Parameters(objective_function, bounds, num_dimensions, num_particles, num_cycles, psi, c1, c2)
-    de_params = de_optimizer.Parameters(objective_function, bounds, num_dimensions, num_population, scaling_factor, crossover_rate, max_generations)
-    abc_params = abc_optimizer.Parameters(objective_function, bounds, num_dimensions, num_employed_bees, num_onlooker_bees, num_scout_bees, max_trials)
+    # Global parameters
+    bounds = []
+    for _ in range (4):
+        bounds.append((INF,SUP))
+    bounds.append((MIN_ANGLE,MAX_ANGLE))
+    num_dimensions = 5
+
+    # Batch version of the objective function : evaluates a whole population at once by clipping the polygon with NumPy
+    batch_objective_function = NumpyRectangleObjective(POLY)
+    termination = None if args.max_evaluations is None else MaxEvaluations(args.max_evaluations)
+
+    # Instance of class and of Parameters
+    optimizers = {
+        'PSO': (Pso(), Pso.Parameters(batch_objective_function, bounds, num_dimensions, args.num_particles, args.num_cycles, args.psi, args.c1, args.c2,
+                                      termination=termination)),
+        'DE': (De(), De.Parameters(batch_objective_function, bounds, num_dimensions, args.num_population, args.scaling_factor, args.crossover_rate,
+                                   args.max_generations, termination=termination)),
+        'ABC': (Abc(), Abc.Parameters(batch_objective_function, bounds, num_dimensions, args.num_employed_bees, args.num_onlooker_bees, args.num_scout_bees,
+                                      args.max_trials, args.abc_num_cycles, termination=termination)),
+    }
 
     # Running and redering optimization
-    plot_optimization_progress(pso_params, 'PSO', pso_optimizer)
-    plot_optimization_progress(de_params, 'DE', de_optimizer)
-    plot_optimization_progress(abc_params, 'ABC', abc_optimizer)
+    animations = []
+    for optimizer in args.optimizers:
+        empty_directory(os.path.join(args.output_dir, 'KPI', optimizer))
+        optimizer_instance, params = optimizers[optimizer]
+        animations.append(plot_optimization_progress(params, optimizer, optimizer_instance, args.runs, args.seed, args.workers, args.output_dir, args.headless))
+
+    if not args.headless:
+        from rendering import render_best_runs
+        for job in animations:
+            job.update(poly=POLY, max_frames=args.max_frames, decimation=args.decimation)
+        render_best_runs(animations, args.workers)
 
-   
\ No newline at end of file
+if __name__ == "__main__":
+    main()
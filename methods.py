@@ -1,10 +1,274 @@
-import random
-import copy
+import time
+import numpy as np
+
+from evaluators import SerialEvaluator
+from profiling import Profiler, NO_PROFILING
+
+# region 0 : Common
+def bounds_arrays(bounds):
+    bounds = np.asarray(bounds, dtype=float)
+    return bounds[:, 0], bounds[:, 1]
+
+def random_positions(bounds, num_positions, rng):
+    lower, upper = bounds_arrays(bounds)
+    return rng.uniform(lower, upper, size=(num_positions, len(lower)))
+
+def evaluate(params, positions):
+    return params.evaluator.evaluate(params.objective_function, positions)
+
+class RunResult(tuple):
+    # Unpacks as (best_position, best_fitness, best_position_progress, best_fitness_progress), run statistics are attributes
+    def __new__(cls, best_position, best_fitness, best_position_progress, best_fitness_progress, **statistics):
+        result = super().__new__(cls, (best_position, best_fitness, best_position_progress, best_fitness_progress))
+        result.__dict__.update(statistics)
+        return result
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    best_position = property(lambda self: self[0])
+    best_fitness = property(lambda self: self[1])
+    best_position_progress = property(lambda self: self[2])
+    best_fitness_progress = property(lambda self: self[3])
+
+class History:
+    # Convergence history preallocated for `num_iterations` iterations, the recording levels are :
+    # 'none', 'fitness' (best fitness), 'position' (best fitness and position) and 'population' (plus population snapshots every `snapshot_interval` iterations)
+    LEVELS = ('none', 'fitness', 'position', 'population')
+
+    def __init__(self, level, num_iterations, num_dimensions, snapshot_interval=1):
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown history level {level!r}, expected one of {self.LEVELS}")
+        self.level = level
+        self.size = 0
+        self.snapshot_interval = snapshot_interval
+        self.best_fitness = np.empty(num_iterations) if level != 'none' else None
+        self.best_positions = np.empty((num_iterations, num_dimensions)) if level in ('position', 'population') else None
+        self.num_snapshots = -(-num_iterations // snapshot_interval) if level == 'population' else 0
+        self.snapshot_iterations = np.empty(self.num_snapshots, dtype=int)
+        self.snapshot_positions = None  # Allocated on the first snapshot, once the population size is known
+        self.snapshot_fitness = None
+        self.snapshot_count = 0
+
+    def record(self, best_position, best_fitness, positions=None, fitness=None):
+        if self.level == 'none':
+            return
+        self.best_fitness[self.size] = best_fitness
+        if self.best_positions is not None:
+            self.best_positions[self.size] = best_position
+        if self.num_snapshots and self.size % self.snapshot_interval == 0:
+            if self.snapshot_positions is None:
+                self.snapshot_positions = np.empty((self.num_snapshots,) + positions.shape)
+                self.snapshot_fitness = np.empty((self.num_snapshots, len(fitness)))
+            self.snapshot_iterations[self.snapshot_count] = self.size
+            self.snapshot_positions[self.snapshot_count] = positions
+            self.snapshot_fitness[self.snapshot_count] = fitness
+            self.snapshot_count += 1
+        self.size += 1
+
+    def best_fitness_progress(self):
+        return None if self.best_fitness is None else self.best_fitness[:self.size]
+
+    def best_position_progress(self):
+        return None if self.best_positions is None else self.best_positions[:self.size]
+
+    def snapshots(self):
+        # (iterations, positions, fitness) of the population snapshots
+        if self.snapshot_positions is None:
+            return None
+        count = self.snapshot_count
+        return self.snapshot_iterations[:count], self.snapshot_positions[:count], self.snapshot_fitness[:count]
+
+class Optimizer:
+    # Hooks shared by the three optimizers : per-iteration callbacks and profiling of the phases of a run
+    def __init__(self, profile=False):
+        self.callbacks = []
+        self.profile = profile
+
+    def add_callback(self, callback):
+        # `callback(run)` is called after each iteration, returning True stops the run
+        self.callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+class Run:
+    # State of a single run shared by the three optimizers : random generator, evaluations, history and statistics
+    def __init__(self, params, rng, num_iterations, optimizer=None):
+        self.params = params
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.callbacks = [] if optimizer is None else optimizer.callbacks
+        # Phases are only timed when profiling or when callbacks may read the timers
+        self.profiler = Profiler() if optimizer is not None and (optimizer.profile or optimizer.callbacks) else None
+        self.evaluations = 0  # Calls to the objective function (cache hits excluded)
+        self.cache_statistics = None if params.cache is None else params.cache.statistics()
+        self.screened = 0  # Candidates discarded by the surrogate without being evaluated
+        if params.surrogate is not None:
+            params.surrogate.start(params.bounds)
+        self.history = History(params.history, num_iterations, params.num_dimensions, params.snapshot_interval)
+        self.iterations = 0
+        self.best_fitness = float('-inf')
+        self.best_position = None
+        self.positions = None
+        self.stop_reason = 'max_iterations'
+        self.start_time = time.perf_counter()
+        if params.termination is not None:
+            params.termination.start(self)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def phase(self, name):
+        return NO_PROFILING if self.profiler is None else self.profiler.phase(name)
+
+    def evaluate_uncached(self, positions):
+        self.evaluations += len(positions)
+        with self.phase('evaluation'):
+            return evaluate(self.params, positions)
+
+    def remaining_evaluations(self):
+        # Evaluations left before the termination criterion fires (None when unbounded)
+        return None if self.params.termination is None else self.params.termination.remaining_evaluations(self)
+
+    def screen(self, positions):
+        # Mask of the candidates to evaluate : the promising ones according to the surrogate (all of them without surrogate),
+        # within the remaining evaluation budget
+        selected = np.ones(len(positions), dtype=bool)
+        surrogate = self.params.surrogate
+        if surrogate is not None:
+            selected = surrogate.screen(positions)
+            self.screened += len(positions) - np.count_nonzero(selected)
+        budget = self.remaining_evaluations()
+        if budget is not None:
+            selected[np.flatnonzero(selected)[budget:]] = False
+        return selected
+
+    def evaluate(self, positions, screen=False):
+        # With `screen`, the candidates discarded by the surrogate or beyond the evaluation budget get a fitness of -inf
+        # (never selected)
+        if screen:
+            selected = self.screen(positions)
+            fitness = np.full(len(positions), float('-inf'))
+            fitness[selected] = self.evaluate(positions[selected])
+            return fitness
+        if self.params.cache is None:
+            fitness = self.evaluate_uncached(positions)
+        else:
+            fitness = self.params.cache.evaluate(positions, self.evaluate_uncached)
+        if self.params.surrogate is not None:
+            self.params.surrogate.add(positions, fitness)
+        return fitness
+
+    def record(self, best_position, best_fitness, positions=None, fitness=None):
+        self.history.record(best_position, best_fitness, positions, fitness)
+        self.iterations += 1
+        self.best_position = best_position
+        self.best_fitness = float(best_fitness)
+        self.positions = positions
+
+    def should_stop(self):
+        for callback in self.callbacks:
+            if callback(self):
+                self.stop_reason = 'callback'
+                return True
+        if self.params.termination is None:
+            return False
+        reason = self.params.termination.check(self)
+        if reason is not None:
+            self.stop_reason = reason
+        return reason is not None
+
+    def result(self, best_position, best_fitness):
+        statistics = {'evaluations': self.evaluations, 'iterations': self.iterations, 'stop_reason': self.stop_reason,
+                      'elapsed': self.elapsed(), 'history': self.history}
+        if self.profiler is not None:
+            statistics['profile'] = self.profiler.report(statistics['elapsed'])
+        if self.params.surrogate is not None:
+            statistics['screened'] = self.screened
+        if self.params.cache is not None:
+            statistics['cache_statistics'] = self.params.cache.statistics(since=self.cache_statistics)
+        return RunResult(best_position, best_fitness, self.history.best_position_progress(), self.history.best_fitness_progress(),
+                         **statistics)
+class Session:
+    # Ask / tell interface : candidates are asked one at a time and their fitness is told back in any order,
+    # each tell updates the population immediately (steady-state). Every slot of the population is asked in turn.
+    def __init__(self, params, num_slots, rng=None):
+        self.params = params
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.lower, self.upper = bounds_arrays(params.bounds)
+        self.positions = np.empty((num_slots, params.num_dimensions))
+        self.fitness = np.full(num_slots, float('-inf'))
+        self.evaluated = np.zeros(num_slots, dtype=bool)
+        self.pending = {}  # Ticket : (slot, position)
+        self.next_ticket = 0
+        self.next_slot = 0
+        self.evaluations = 0
+        self.best_position = None
+        self.best_fitness = float('-inf')
+        self.best_fitness_progress = []  # Best fitness after each tell
+        self.start_time = time.perf_counter()
+
+    def random_position(self):
+        return self.rng.uniform(self.lower, self.upper)
+
+    def ask(self):
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % len(self.fitness)
+        slot, position = self.propose(slot)
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.pending[ticket] = (slot, position)
+        return ticket, position.copy()
+
+    def tell(self, ticket, fitness):
+        slot, position = self.pending.pop(ticket)
+        fitness = float(fitness)
+        self.evaluations += 1
+        if fitness > self.best_fitness and np.all((position >= self.lower) & (position <= self.upper)):
+            self.best_position = position.copy()
+            self.best_fitness = fitness
+        self.accept(slot, position, fitness)
+        self.best_fitness_progress.append(self.best_fitness)
+
+    def propose(self, slot):
+        raise NotImplementedError
+
+    def accept(self, slot, position, fitness):
+        raise NotImplementedError
+
+    def settle(self, slot, position, fitness):
+        self.positions[slot] = position
+        self.fitness[slot] = fitness
+        self.evaluated[slot] = True
+
+    def top(self, count):
+        evaluated = np.flatnonzero(self.evaluated)
+        best = evaluated[np.argsort(-self.fitness[evaluated], kind='stable')[:count]]
+        return self.positions[best].copy(), self.fitness[best].copy()
+
+    def inject(self, positions, fitness):
+        # Migrants replace the worst (or not yet evaluated) slots when they are better
+        for position, value in zip(positions, fitness):
+            worst = int(np.argmin(np.where(self.evaluated, self.fitness, float('-inf'))))
+            if self.evaluated[worst] and value <= self.fitness[worst]:
+                continue
+            self.settle(worst, position, value)
+            if value > self.best_fitness:
+                self.best_position = np.array(position, dtype=float)
+                self.best_fitness = float(value)
+
+    def result(self):
+        best_position = None if self.best_position is None else self.best_position.tolist()
+        return RunResult(best_position, self.best_fitness, None, np.array(self.best_fitness_progress), evaluations=self.evaluations,
+                         iterations=self.evaluations, stop_reason='max_evaluations', elapsed=time.perf_counter() - self.start_time)
+# endregion
 
 # region 1 : PSO
-class Pso:
+class Pso(Optimizer):
     class Parameters:
-        def __init__(self, objective_function, bounds, num_dimensions, num_particles, num_cycles, psi, c1, c2):
+        def __init__(self, objective_function, bounds, num_dimensions, num_particles, num_cycles, psi, c1, c2, evaluator=None, cache=None,
+                    history='position', snapshot_interval=1, termination=None, surrogate=None):
             self.objective_function = objective_function
             self.bounds = bounds  # 2D
             self.num_dimensions = num_dimensions
@@ -13,101 +277,133 @@ class Pso:
             self.psi = psi
             self.c1 = c1
             self.c2 = c2
+            self.evaluator = SerialEvaluator() if evaluator is None else evaluator
+            self.cache = cache  # Optional FitnessCache
+            self.history = history  # History level : 'none', 'fitness', 'position' or 'population'
+            self.snapshot_interval = snapshot_interval  # Iterations between population snapshots
+            self.termination = termination  # Optional termination criterion (see termination.py)
+            self.surrogate = surrogate  # Optional surrogate pre-screening the candidates (see surrogate.py)
 
-    class Particle:
-        def __init__(self, position, fitness, personal_best_position, personal_best_fitness, informants_best_position,
-                    informants_best_fitness, velocity):
-            self.position = position
+    class Swarm:
+        # One row per particle, one column per dimension
+        def __init__(self, positions, fitness, personal_best_positions, personal_best_fitness, informants_best_position,
+                    informants_best_fitness, velocities):
+            self.positions = positions
             self.fitness = fitness
-            self.personal_best_position = personal_best_position
+            self.personal_best_positions = personal_best_positions
             self.personal_best_fitness = personal_best_fitness
             self.informants_best_position = informants_best_position
             self.informants_best_fitness = informants_best_fitness
-            self.velocity = velocity
-
-    def controled_particles(self, particles, params):
-        sublist_particles = []
-        for particle in particles : 
-            take = True
-            for i,position in enumerate(particle.position) : 
-                if params.bounds[i][0] > position or position > params.bounds[i][1] : 
-                    take = False
-            if take : 
-                sublist_particles.append(particle)
-        return sublist_particles
-    
-    def init_particles(self, params):
-        particles = []
-        for _ in range(params.num_particles):
-            positions = []
-            for bound in params.bounds : 
-                position = random.uniform(bound[0],bound[1])
-                positions.append(position)
-            new_particle = self.Particle(positions, params.objective_function(positions), positions,
-                                        params.objective_function(positions), None, None, [0.0] * params.num_dimensions)
-            particles.append(new_particle)
-        return particles
-
-    def best_particle(self, particles):
-        best_fit = float('-inf')
-        best_particle = None
-        for particle in particles : 
-            if particle.personal_best_fitness >= best_fit : 
-                best_particle = particle 
-                best_fit =  particle.personal_best_fitness
-        return best_particle
-    
-    def update(self, particles, params):
-        controled_particles = self.controled_particles(particles, params)
-        best_particle = self.best_particle(controled_particles)
-        for particle in particles:
-            if particle in controled_particles : 
-                # Update personal best
-                if particle.fitness > particle.personal_best_fitness:
-                    particle.personal_best_fitness = particle.fitness
-                    particle.personal_best_position = copy.deepcopy(particle.position)
-            particle.informants_best_position = copy.deepcopy(best_particle.position)
-            particle.informants_best_fitness = best_particle.personal_best_fitness
-
-    def move(self, particles, params):
-        for particle in particles:
-            new_velocity = [0.0] * params.num_dimensions
-            for i in range(params.num_dimensions):
-                r1 = random.uniform(0, 1)
-                r2 = random.uniform(0, 1)
-                cognitive_component = params.c1 * r1 * (particle.personal_best_position[i] - particle.position[i])
-                social_component = params.c2 * r2 * (particle.informants_best_position[i] - particle.position[i])
-                new_velocity[i] = params.psi * particle.velocity[i] + cognitive_component + social_component
-                particle.position[i] += new_velocity[i]
-
-            particle.velocity = new_velocity
-            particle.fitness = params.objective_function(particle.position)
-
-    def pso(self, params):
-        particles = self.init_particles(params)
-        best_global_position = None
-        best_global_fitness = float('-inf')
-        best_fitness_progress = []
-        best_position_progress = []
+            self.velocities = velocities
+
+    def controled_particles(self, swarm, params):
+        lower, upper = bounds_arrays(params.bounds)
+        return np.all((swarm.positions >= lower) & (swarm.positions <= upper), axis=1)
+
+    def init_particles(self, params, run):
+        positions = random_positions(params.bounds, params.num_particles, run.rng)
+        fitness = run.evaluate(positions)
+        swarm = self.Swarm(positions, fitness, positions.copy(), fitness.copy(), None, None, np.zeros_like(positions))
+        self.update_informants(swarm)
+        return swarm
+
+    def best_particle(self, swarm):
+        return int(np.argmax(swarm.personal_best_fitness))
+
+    def update_informants(self, swarm):
+        best = self.best_particle(swarm)
+        swarm.informants_best_position = swarm.personal_best_positions[best].copy()
+        swarm.informants_best_fitness = swarm.personal_best_fitness[best]
+
+    def update(self, swarm, params):
+        # Personal bests only move to improved positions inside the bounds
+        improved = self.controled_particles(swarm, params) & (swarm.fitness > swarm.personal_best_fitness)
+        swarm.personal_best_positions[improved] = swarm.positions[improved]
+        swarm.personal_best_fitness[improved] = swarm.fitness[improved]
+        self.update_informants(swarm)
+
+    def move(self, swarm, params, run):
+        r1 = run.rng.random(swarm.positions.shape)
+        r2 = run.rng.random(swarm.positions.shape)
+        cognitive_component = params.c1 * r1 * (swarm.personal_best_positions - swarm.positions)
+        social_component = params.c2 * r2 * (swarm.informants_best_position - swarm.positions)
+        velocities = params.psi * swarm.velocities + cognitive_component + social_component
+        positions = swarm.positions + velocities
+
+        # Particles discarded by the surrogate (or beyond the evaluation budget) do not move : they keep their position,
+        # velocity and fitness
+        promising = run.screen(positions)
+        swarm.velocities = np.where(promising[:, None], velocities, swarm.velocities)
+        swarm.positions = np.where(promising[:, None], positions, swarm.positions)
+        fitness = swarm.fitness.copy()
+        fitness[promising] = run.evaluate(positions[promising])
+        swarm.fitness = fitness
+
+    def pso(self, params, rng=None):
+        run = Run(params, rng, params.num_cycles, self)
+        with run.phase('init'):
+            swarm = self.init_particles(params, run)
 
         for cycle in range(params.num_cycles):
-            self.update(particles, params)
-            self.move(particles, params)
+            with run.phase('move'):
+                self.move(swarm, params, run)
+            with run.phase('update'):
+                self.update(swarm, params)
+
+            run.record(swarm.informants_best_position, swarm.informants_best_fitness, swarm.positions, swarm.fitness)
+            if run.should_stop():
+                break
+        best_global_position = swarm.informants_best_position.tolist()
+        best_global_fitness = float(swarm.informants_best_fitness)
+        return run.result(best_global_position, best_global_fitness)
+    class Session(Session):
+        # Steady-state PSO : a particle moves when it is asked, its personal best and the global best are updated when it is told
+        def __init__(self, params, rng=None):
+            super().__init__(params, params.num_particles, rng)
+            self.velocities = np.zeros_like(self.positions)
+            self.personal_best_positions = np.empty_like(self.positions)
+            self.personal_best_fitness = np.full(params.num_particles, float('-inf'))
+            self.initialized = np.zeros(params.num_particles, dtype=bool)
+
+        def propose(self, slot):
+            params = self.params
+            if not self.initialized[slot]:
+                self.positions[slot] = self.personal_best_positions[slot] = self.random_position()
+                self.initialized[slot] = True
+                return slot, self.positions[slot].copy()
+            position = self.positions[slot]
+            informants_best_position = position if self.best_position is None else self.best_position
+            r1 = self.rng.random(params.num_dimensions)
+            r2 = self.rng.random(params.num_dimensions)
+            self.velocities[slot] = (params.psi * self.velocities[slot] + params.c1 * r1 * (self.personal_best_positions[slot] - position)
+                                     + params.c2 * r2 * (informants_best_position - position))
+            self.positions[slot] += self.velocities[slot]
+            return slot, self.positions[slot].copy()
+
+        def accept(self, slot, position, fitness):
+            in_bounds = np.all((position >= self.lower) & (position <= self.upper))
+            if in_bounds and fitness > self.personal_best_fitness[slot]:
+                self.personal_best_positions[slot] = position
+                self.personal_best_fitness[slot] = fitness
+            self.fitness[slot] = fitness
+            self.evaluated[slot] = True
 
-            for particle in particles:
-                if particle.fitness > best_global_fitness:
-                    best_global_fitness = particle.personal_best_fitness
-                    best_global_position = copy.deepcopy(particle.personal_best_position)
+        def settle(self, slot, position, fitness):
+            super().settle(slot, position, fitness)
+            self.velocities[slot] = 0.0
+            self.personal_best_positions[slot] = position
+            self.personal_best_fitness[slot] = fitness
+            self.initialized[slot] = True
 
-            best_fitness_progress.append(best_global_fitness)  
-            best_position_progress.append(best_global_position)
-        return best_global_position, best_global_fitness, best_position_progress, best_fitness_progress
+    def session(self, params, rng=None):
+        return self.Session(params, rng)
 # endregion
 
 # region 2 : DE
-class De:
+class De(Optimizer):
     class Parameters:
-        def __init__(self, objective_function, bounds, num_dimensions, num_population, scaling_factor, crossover_rate, max_generations):
+        def __init__(self, objective_function, bounds, num_dimensions, num_population, scaling_factor, crossover_rate, max_generations, evaluator=None, cache=None,
+                    history='position', snapshot_interval=1, termination=None, surrogate=None):
             self.objective_function = objective_function
             self.bounds = bounds  # 2D
             self.num_dimensions = num_dimensions
@@ -115,134 +411,255 @@ class De:
             self.scaling_factor = scaling_factor
             self.crossover_rate = crossover_rate
             self.max_generations = max_generations
+            self.evaluator = SerialEvaluator() if evaluator is None else evaluator
+            self.cache = cache  # Optional FitnessCache
+            self.history = history  # History level : 'none', 'fitness', 'position' or 'population'
+            self.snapshot_interval = snapshot_interval  # Iterations between population snapshots
+            self.termination = termination  # Optional termination criterion (see termination.py)
+            self.surrogate = surrogate  # Optional surrogate pre-screening the candidates (see surrogate.py)
 
-    class Individual:
-        def __init__(self, position, fitness):
-            self.position = position
+    class Population:
+        # One row per individual, one column per dimension
+        def __init__(self, positions, fitness):
+            self.positions = positions
             self.fitness = fitness
 
-    def init_population(self, params):
-        population = []
-        for _ in range(params.num_population):
-            positions = []
-            for bound in params.bounds:
-                position = random.uniform(bound[0], bound[1])
-                positions.append(position)
-            new_individual = self.Individual(positions, params.objective_function(positions))
-            population.append(new_individual)
-        return population
-
-    def mutate(self, target_individual_position, population, params):
-        candidate_vector = copy.deepcopy(target_individual_position)
-        dimension_to_mutate = random.randint(0, params.num_dimensions - 1)
-
-        for i in range(params.num_dimensions):
-            if i == dimension_to_mutate or random.random() < params.crossover_rate:
-                candidate_vector[i] = target_individual_position[i] + params.scaling_factor * (population[0].position[i] - target_individual_position[i]) + params.scaling_factor * (population[1].position[i] - population[2].position[i])
-                candidate_vector[i] = max(params.bounds[i][0], min(candidate_vector[i], params.bounds[i][1]))
-
-        return candidate_vector
-
-    def de(self, params):
-        population = self.init_population(params)
-        best_individual = max(population, key=lambda x: x.fitness)
-        generation = 0
-        best_fitness_progress = []  
-        best_position_progress = []
-
-        while generation < params.max_generations:
-            new_population = []
-            for target_individual in population:
-                # Select three distinct individuals for mutation
-                candidate_indices = list(range(params.num_population))
-                candidate_indices.remove(population.index(target_individual))  
-                a, b, c = random.sample(candidate_indices, 3)  
-                random_individuals = [population[a], population[b], population[c]]  
-
-                trial_vector = self.mutate(target_individual.position, random_individuals, params)
-                trial_fitness = params.objective_function(trial_vector)
-
-                # Selection : descendant or target_individual
-                if trial_fitness >= target_individual.fitness:
-                    new_individual = self.Individual(trial_vector, trial_fitness)
-                    new_population.append(new_individual)
-                else:
-                    new_population.append(target_individual)
-
-            population = new_population
-            best_individual = max(population, key=lambda x: x.fitness)
-            best_fitness_progress.append(best_individual.fitness)  
-            best_position_progress.append(best_individual.position)
-            generation += 1
-
-        return best_individual.position, best_individual.fitness, best_position_progress, best_fitness_progress
+    def init_population(self, params, run):
+        positions = random_positions(params.bounds, params.num_population, run.rng)
+        return self.Population(positions, run.evaluate(positions))
+
+    def distinct_indices(self, num_population, count, rng):
+        # Row i holds `count` distinct indices, all different from i
+        chosen = np.arange(num_population)[:, None]
+        for k in range(count):
+            index = rng.integers(0, num_population - 1 - k, size=num_population)
+            # Shift the draw past every already chosen index (in increasing order) to skip them
+            for excluded in np.sort(chosen, axis=1).T:
+                index += index >= excluded
+            chosen = np.column_stack((chosen, index))
+        return chosen[:, 1:]
+
+    def mutate(self, population, params, rng):
+        targets = population.positions
+        a, b, c = self.distinct_indices(params.num_population, 3, rng).T
+        mutants = targets + params.scaling_factor * (targets[a] - targets) + params.scaling_factor * (targets[b] - targets[c])
+
+        # Binomial crossover, with at least one mutated dimension per individual
+        crossover_mask = rng.random(targets.shape) < params.crossover_rate
+        crossover_mask[np.arange(params.num_population), rng.integers(0, params.num_dimensions, size=params.num_population)] = True
+        lower, upper = bounds_arrays(params.bounds)
+        return np.clip(np.where(crossover_mask, mutants, targets), lower, upper)
+
+    def select(self, population, trial_vectors, trial_fitness):
+        # Selection : descendant or target individual
+        replaced = trial_fitness >= population.fitness
+        population.positions[replaced] = trial_vectors[replaced]
+        population.fitness[replaced] = trial_fitness[replaced]
+
+    def de(self, params, rng=None):
+        run = Run(params, rng, params.max_generations, self)
+        with run.phase('init'):
+            population = self.init_population(params, run)
+
+        for generation in range(params.max_generations):
+            with run.phase('move'):
+                trial_vectors = self.mutate(population, params, run.rng)
+            trial_fitness = run.evaluate(trial_vectors, screen=True)
+            with run.phase('update'):
+                self.select(population, trial_vectors, trial_fitness)
+
+            best = int(np.argmax(population.fitness))
+            run.record(population.positions[best], population.fitness[best], population.positions, population.fitness)
+            if run.should_stop():
+                break
+
+        best = int(np.argmax(population.fitness))
+        return run.result(population.positions[best].tolist(), float(population.fitness[best]))
+    class Session(Session):
+        # Steady-state DE : each trial vector replaces its target individual as soon as it is told, if it is not worse
+        def __init__(self, params, rng=None):
+            super().__init__(params, params.num_population, rng)
+
+        def propose(self, slot):
+            params = self.params
+            donors = np.flatnonzero(self.evaluated)
+            donors = donors[donors != slot]
+            if not self.evaluated[slot] or len(donors) < 3:
+                return slot, self.random_position()
+            target = self.positions[slot]
+            a, b, c = self.positions[self.rng.choice(donors, 3, replace=False)]
+            mutant = target + params.scaling_factor * (a - target) + params.scaling_factor * (b - c)
+            crossover_mask = self.rng.random(params.num_dimensions) < params.crossover_rate
+            crossover_mask[self.rng.integers(0, params.num_dimensions)] = True
+            return slot, np.clip(np.where(crossover_mask, mutant, target), self.lower, self.upper)
+
+        def accept(self, slot, position, fitness):
+            if not self.evaluated[slot] or fitness >= self.fitness[slot]:
+                self.positions[slot] = position
+                self.fitness[slot] = fitness
+                self.evaluated[slot] = True
+
+    def session(self, params, rng=None):
+        return self.Session(params, rng)
 # endregion
 
 # region 3 : ABC
-class Abc:
+class Abc(Optimizer):
     class Parameters:
-        def __init__(self, objective_function, bounds, num_dimensions, num_employed_bees, num_onlooker_bees, num_scout_bees, max_trials):
+        def __init__(self, objective_function, bounds, num_dimensions, num_employed_bees, num_onlooker_bees, num_scout_bees, max_trials,
+                    num_cycles=None, evaluator=None, cache=None,
+                    history='position', snapshot_interval=1, termination=None, surrogate=None):
             self.objective_function = objective_function
             self.bounds = bounds
             self.num_dimensions = num_dimensions
-            self.num_employed_bees = num_employed_bees
+            self.num_employed_bees = num_employed_bees  # One food source per employed bee
             self.num_onlooker_bees = num_onlooker_bees
-            self.num_scout_bees = num_scout_bees
-            self.max_trials = max_trials
+            self.num_scout_bees = num_scout_bees  # Maximum number of sources abandoned per cycle
+            self.max_trials = max_trials  # Unsuccessful trials before a source is abandoned
+            self.num_cycles = max_trials if num_cycles is None else num_cycles
+            self.evaluator = SerialEvaluator() if evaluator is None else evaluator
+            self.cache = cache  # Optional FitnessCache
+            self.history = history  # History level : 'none', 'fitness', 'position' or 'population'
+            self.snapshot_interval = snapshot_interval  # Iterations between population snapshots
+            self.termination = termination  # Optional termination criterion (see termination.py)
+            self.surrogate = surrogate  # Optional surrogate pre-screening the candidates (see surrogate.py)
 
-    class FoodSource:
-        def __init__(self, position, fitness, trials):
-            self.position = position
-            self.fitness = fitness  
+    class FoodSources:
+        # One row per food source, one column per dimension
+        def __init__(self, positions, fitness, trials):
+            self.positions = positions
+            self.fitness = fitness
             self.trials = trials
 
-    def init_population(self, params):
-        population = []
-        for _ in range(params.num_employed_bees + params.num_onlooker_bees):
-            positions = [random.uniform(bound[0], bound[1]) for bound in params.bounds]
-            fitness = params.objective_function(positions)
-            population.append(self.FoodSource(positions, fitness, 0))
-        return population
-
-    def select_food_sources(self, population):
-        total_fitness = sum(fs.fitness for fs in population)
-        selected = []
-        for source in population:
-            probability = source.fitness / total_fitness  # Inversez la fitness
-            if random.random() < probability:
-                selected.append(source)
-        return selected
+    def init_population(self, params, run):
+        positions = random_positions(params.bounds, params.num_employed_bees, run.rng)
+        return self.FoodSources(positions, run.evaluate(positions), np.zeros(params.num_employed_bees, dtype=int))
+
+    def neighbours(self, food_sources, sources, params, rng):
+        # Move one random dimension of each source relatively to another random source
+        num_sources = len(food_sources.fitness)
+        rows = np.arange(len(sources))
+        partners = rng.integers(0, num_sources - 1, size=len(sources))
+        partners += partners >= sources
+        dimensions = rng.integers(0, params.num_dimensions, size=len(sources))
+        phi = rng.uniform(-1, 1, size=len(sources))
+
+        positions = food_sources.positions[sources]
+        positions[rows, dimensions] += phi * (positions[rows, dimensions] - food_sources.positions[partners, dimensions])
+        lower, upper = bounds_arrays(params.bounds)
+        return np.clip(positions, lower, upper)
+
+    def select_food_sources(self, food_sources, num_bees, rng):
+        # Roulette wheel on fitness shifted to be non-negative (the objective may be negative)
+        weights = food_sources.fitness - np.min(food_sources.fitness)
+        if not np.any(weights > 0):
+            weights = np.ones_like(weights)
+        cumulative_weights = np.cumsum(weights)
+        return np.searchsorted(cumulative_weights, rng.random(num_bees) * cumulative_weights[-1], side='right')
+
+    def update_food_source(self, food_sources, sources, params, run):
+        positions = self.neighbours(food_sources, sources, params, run.rng)
+
+        # Candidates discarded by the surrogate (or beyond the evaluation budget) are neither selected nor counted as
+        # unsuccessful trials
+        promising = run.screen(positions)
+        fitness = np.full(len(positions), float('-inf'))
+        fitness[promising] = run.evaluate(positions[promising])
+        improved = fitness > food_sources.fitness[sources]
+        np.add.at(food_sources.trials, sources[promising & ~improved], 1)
+
+        # Greedy selection, when several bees exploit the same source the best candidate is kept
+        order = np.lexsort((fitness[improved], sources[improved]))
+        improved_sources = sources[improved][order]
+        last = np.ones(len(improved_sources), dtype=bool)
+        last[:-1] = improved_sources[1:] != improved_sources[:-1]
+        kept = np.flatnonzero(improved)[order][last]
+        food_sources.positions[sources[kept]] = positions[kept]
+        food_sources.fitness[sources[kept]] = fitness[kept]
+        food_sources.trials[sources[kept]] = 0
+
+    def scout_bees_phase(self, food_sources, params, run):
+        exhausted = np.flatnonzero(food_sources.trials >= params.max_trials)
+        exhausted = exhausted[np.argsort(-food_sources.trials[exhausted], kind='stable')][:params.num_scout_bees]
+        exhausted = exhausted[:run.remaining_evaluations()]  # Sources left as they are beyond the evaluation budget
+        if len(exhausted):
+            food_sources.positions[exhausted] = random_positions(params.bounds, len(exhausted), run.rng)
+            food_sources.fitness[exhausted] = run.evaluate(food_sources.positions[exhausted])
+            food_sources.trials[exhausted] = 0
+
+    def abc(self, params, rng=None):
+        run = Run(params, rng, params.num_cycles, self)
+        with run.phase('init'):
+            food_sources = self.init_population(params, run)
+        best = int(np.argmax(food_sources.fitness))
+        best_position = food_sources.positions[best].copy()
+        best_fitness = float(food_sources.fitness[best])
+
+        all_sources = np.arange(params.num_employed_bees)
+        for cycle in range(params.num_cycles):
+            # Employed bees, then onlooker bees, then scouts
+            with run.phase('move'):
+                self.update_food_source(food_sources, all_sources, params, run)
+            with run.phase('update'):
+                onlooker_sources = self.select_food_sources(food_sources, params.num_onlooker_bees, run.rng)
+            with run.phase('move'):
+                self.update_food_source(food_sources, onlooker_sources, params, run)
+
+            # The best source is memorized since scouts may abandon it
+            best = int(np.argmax(food_sources.fitness))
+            if food_sources.fitness[best] > best_fitness:
+                best_position = food_sources.positions[best].copy()
+                best_fitness = float(food_sources.fitness[best])
+            with run.phase('scout'):
+                self.scout_bees_phase(food_sources, params, run)
+
+            run.record(best_position, best_fitness, food_sources.positions, food_sources.fitness)
+            if run.should_stop():
+                break
+        return run.result(best_position.tolist(), best_fitness)
+    class Session(Session):
+        # Steady-state ABC : employed and onlooker bees are asked in the proportion of their numbers,
+        # a source abandoned after `max_trials` unsuccessful trials is re-drawn by a scout at its next ask
+        def __init__(self, params, rng=None):
+            super().__init__(params, params.num_employed_bees, rng)
+            self.trials = np.zeros(params.num_employed_bees, dtype=int)
+            self.onlooker_rate = params.num_onlooker_bees / (params.num_employed_bees + params.num_onlooker_bees)
+
+        def propose(self, slot):
+            params = self.params
+            sources = np.flatnonzero(self.evaluated)
+            if self.evaluated[slot] and self.rng.random() < self.onlooker_rate:
+                # Onlooker bee : roulette wheel on fitness shifted to be non-negative
+                weights = self.fitness[sources] - np.min(self.fitness[sources])
+                if not np.any(weights > 0):
+                    weights = np.ones_like(weights)
+                slot = sources[np.searchsorted(np.cumsum(weights), self.rng.random() * np.sum(weights), side='right')]
+            partners = sources[sources != slot]
+            if not self.evaluated[slot] or len(partners) == 0:
+                return slot, self.random_position()
+            position = self.positions[slot].copy()
+            dimension = self.rng.integers(0, params.num_dimensions)
+            partner = self.positions[self.rng.choice(partners), dimension]
+            position[dimension] += self.rng.uniform(-1, 1) * (position[dimension] - partner)
+            return slot, np.clip(position, self.lower, self.upper)
+
+        def accept(self, slot, position, fitness):
+            if not self.evaluated[slot] or fitness > self.fitness[slot]:
+                self.positions[slot] = position
+                self.fitness[slot] = fitness
+                self.evaluated[slot] = True
+                self.trials[slot] = 0
+                return
+            self.trials[slot] += 1
+            abandoned = len(self.fitness) - np.count_nonzero(self.evaluated)
+            if self.trials[slot] >= self.params.max_trials and abandoned < self.params.num_scout_bees:
+                self.evaluated[slot] = False
+                self.trials[slot] = 0
+
+        def settle(self, slot, position, fitness):
+            super().settle(slot, position, fitness)
+            self.trials[slot] = 0
 
-    def update_food_source(self, source, params):
-        position = [p + random.uniform(-1, 1) for p in source.position]
-        for i in range(params.num_dimensions):
-            position[i] = max(params.bounds[i][0], min(position[i], params.bounds[i][1]))
-        fitness = params.objective_function(position)
-        source.position = position
-        source.fitness = fitness  
-
-    def scout_bees_phase(self, population, params):
-        for source in population:
-            if source.trials >= params.max_trials:
-                source.position = [random.uniform(0, 1) for _ in range(params.num_dimensions)]
-                source.fitness = params.objective_function(source.position)
-                source.trials = 0
-
-    def abc(self, params):
-        population = self.init_population(params)
-        best_source = max(population, key=lambda x: x.fitness)  
-        best_fitness_progress = []  
-        best_position_progress = []
-
-        for _ in range(params.num_scout_bees):
-            self.scout_bees_phase(population, params)
-
-        for _ in range(params.max_trials):
-            onlooker_sources = self.select_food_sources(population)
-            for source in onlooker_sources:
-                self.update_food_source(source, params)
-            best_source = max(population, key=lambda x: x.fitness) 
-            best_fitness_progress.append(best_source.fitness)  
-            best_position_progress.append(best_source.position)
-        return best_source.position, best_source.fitness, best_position_progress, best_fitness_progress
+    def session(self, params, rng=None):
+        return self.Session(params, rng)
 # endregion
@@ -0,0 +1,14 @@
+import numpy as np
+
+# Batch protocol : a batch objective maps an (N x num_dimensions) matrix of positions to an array of N fitness values
+def batch_objective(function):
+    function.batch = True
+    return function
+
+def is_batch_objective(objective_function):
+    return getattr(objective_function, 'batch', False)
+
+def evaluate_batch(objective_function, positions):
+    if is_batch_objective(objective_function):
+        return np.asarray(objective_function(positions), dtype=float)
+    return np.array([objective_function(position) for position in positions], dtype=float)
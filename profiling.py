@@ -0,0 +1,39 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+NO_PROFILING = nullcontext()
+
+# Wall time per phase of a run ('init', 'update', 'move', 'evaluation'), nested phases are excluded from their parent
+class Profiler:
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.nested_times = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self.nested_times.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.times[name] += elapsed - self.nested_times.pop()
+            self.calls[name] += 1
+            if self.nested_times:
+                self.nested_times[-1] += elapsed
+
+    def report(self, total_time):
+        # Time not spent in any phase is the optimizer bookkeeping between phases
+        report = {name: {'time': self.times[name], 'calls': self.calls[name], 'share': self.times[name] / total_time if total_time else 0.0}
+                  for name in self.times}
+        other_time = total_time - sum(self.times.values())
+        report['other'] = {'time': other_time, 'calls': 0, 'share': other_time / total_time if total_time else 0.0}
+        return report
+
+def format_profile(profile):
+    lines = [f"{'Phase':<12}{'Time (s)':>12}{'Calls':>10}{'Share':>9}"]
+    for name, phase in sorted(profile.items(), key=lambda item: -item[1]['time']):
+        lines.append(f"{name:<12}{phase['time']:>12.4f}{phase['calls']:>10}{phase['share']:>9.1%}")
+    return '\n'.join(lines)
@@ -0,0 +1,280 @@
+import numpy as np
+
+# UseCase : find the rectangle with the largest area that fits a polygon
+POLY = ((50, 150), (200, 50), (350, 150), (350, 300), (250, 300), (200, 250), (150, 350), (100, 250), (100, 200))
+OUTSIDE_FITNESS = -10000
+
+def rectangle_corners(positions):
+    # Position : anchor point (x, y), width, height and angle (in degrees), one row per rectangle
+    positions = np.atleast_2d(np.asarray(positions, dtype=float))
+    x, y, w, h, angle = positions[:, :5].T
+
+    # From the anchor, sides of length h, w and h, turning by 90 degrees at each corner
+    # (the angle is accumulated like in the reference objective function, so that the corners are rounded the same way)
+    directions = np.cumsum(np.column_stack((np.radians(angle), np.full((len(angle), 2), np.radians(90)))), axis=1)
+    lengths = np.column_stack((h, w, h))
+    steps = np.stack((lengths * np.cos(directions), lengths * np.sin(directions)), axis=-1)
+    anchors = np.stack((x, y), axis=-1)[:, None, :]
+    return np.concatenate((anchors, steps), axis=1).cumsum(axis=1)
+
+class RectangleObjective:
+    # Batch objective : all the rectangles of a batch are built and tested against the container at once
+    # Shapely is imported when needed only, NumpyRectangleObjective does not need it
+    batch = True
+
+    def __init__(self, poly):
+        import shapely
+
+        self.poly = poly
+        self.container = shapely.Polygon(poly)
+        shapely.prepare(self.container)
+
+    def __getstate__(self):
+        return {'poly': self.poly}
+
+    def __setstate__(self, state):
+        self.__init__(state['poly'])
+
+    def __call__(self, positions):
+        import shapely
+
+        positions = np.atleast_2d(np.asarray(positions, dtype=float))
+        rectangles = shapely.polygons(rectangle_corners(positions))
+        areas = shapely.area(rectangles)
+        fitness = np.full(len(rectangles), OUTSIDE_FITNESS, dtype=float)
+
+        # Flat rectangles (zero width or height) are outside, like in the reference objective function of main.py
+        inside = shapely.contains(self.container, rectangles) & (positions[:, 2] * positions[:, 3] != 0)
+        fitness[inside] = areas[inside]
+
+        # Partially outside : minus the area outside the polygon
+        partial = ~inside & shapely.intersects(self.container, rectangles) & (positions[:, 2] * positions[:, 3] != 0)
+        fitness[partial] = shapely.area(shapely.intersection(self.container, rectangles[partial])) - areas[partial]
+        return fitness
+
+def cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def following(values):
+    # Next vertex of every vertex of a batch of polygons (faster than np.roll on small arrays)
+    return np.concatenate((values[:, 1:], values[:, :1]), axis=1)
+
+def polygon_areas(vertices):
+    # Shoelace formula, vertices padded with repeated points (zero length edges) are allowed
+    return 0.5 * cross(vertices, following(vertices)).sum(axis=-1)
+
+def compact(points, valid):
+    # Valid points first (in order), the rows are padded with their last valid point (with the origin when empty)
+    counts = valid.sum(axis=1)
+    rows, columns = np.nonzero(valid)
+    last = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    compacted = np.empty((len(points), max(counts.max(initial=0), 1), 2))
+    compacted[:] = np.where(counts[:, None] > 0, points[np.arange(len(points)), last], 0)[:, None, :]
+    compacted[rows, np.cumsum(valid, axis=1)[rows, columns] - 1] = points[rows, columns]
+    return compacted
+
+def clip_polygons(subjects, start, end, orientation):
+    # Sutherland-Hodgman step : keeps the part of every subject polygon on the inner side of the line (start, end)
+    edge = (end - start)[:, None, :]
+    distances = orientation[:, None] * cross(edge, subjects - start[:, None, :])
+    following_vertices = following(subjects)
+    following_distances = following(distances)
+    inside = distances >= 0
+    following_inside = following_distances >= 0
+
+    # Crossing point of the edge (vertex, following vertex) when one end only is inside
+    crossing = inside != following_inside
+    t = np.divide(distances, distances - following_distances, out=np.zeros_like(distances), where=crossing)[..., None]
+    intersections = subjects + t * (following_vertices - subjects)
+
+    # For each edge : its crossing point then its end vertex (when inside)
+    num_subjects, num_vertices = crossing.shape
+    points = np.empty((num_subjects, num_vertices, 2, 2))
+    points[:, :, 0] = intersections
+    points[:, :, 1] = following_vertices
+    valid = np.empty((num_subjects, num_vertices, 2), dtype=bool)
+    valid[:, :, 0] = crossing
+    valid[:, :, 1] = following_inside
+    points = points.reshape(num_subjects, 2 * num_vertices, 2)
+    valid = valid.reshape(num_subjects, 2 * num_vertices)
+    return compact(points, valid)
+
+def on_segment(a, b, p, d):
+    # Point p on the segment (a, b), d being the cross product of (b - a) and (p - a)
+    return (d == 0) & (np.minimum(a, b) <= p).all(axis=-1) & (p <= np.maximum(a, b)).all(axis=-1)
+
+def squared_segment_distances(points, start, edge, squared_lengths):
+    # Squared distances from points to segments (start, start + edge), broadcast over the leading axes
+    dx, dy = points[..., 0] - start[..., 0], points[..., 1] - start[..., 1]
+    t = np.minimum(np.maximum((dx * edge[..., 0] + dy * edge[..., 1]) / squared_lengths, 0), 1)
+    dx -= t * edge[..., 0]
+    dy -= t * edge[..., 1]
+    return dx * dx + dy * dy
+
+def segments_intersect(p1, p2, q1, q2, proper_only=False):
+    # Closed segments (touching and collinear overlapping segments intersect), broadcast over the leading axes
+    # With proper_only, only the segments crossing at a single point inside both of them
+    d1 = cross(q2 - q1, p1 - q1)
+    d2 = cross(q2 - q1, p2 - q1)
+    d3 = cross(p2 - p1, q1 - p1)
+    d4 = cross(p2 - p1, q2 - p1)
+    proper = (d1 * d2 < 0) & (d3 * d4 < 0)
+    if proper_only:
+        return proper
+    return proper | on_segment(q1, q2, p1, d1) | on_segment(q1, q2, p2, d2) | on_segment(p1, p2, q1, d3) | on_segment(p1, p2, q2, d4)
+
+class NumpyRectangleObjective:
+    # Batch objective computing the same fitness as RectangleObjective with NumPy only : the container is clipped by the
+    # 4 sides of every rectangle at once, without any geometry object
+    batch = True
+
+    def __init__(self, poly, tolerance=1e-12):
+        self.poly = poly
+        self.vertices = np.asarray(poly, dtype=float)
+        self.edges = np.roll(self.vertices, -1, axis=0) - self.vertices
+        self.squared_lengths = np.sum(self.edges * self.edges, axis=1)
+        self.lower = self.vertices.min(axis=0)
+        self.upper = self.vertices.max(axis=0)
+        # Areas below epsilon are rounding errors (relative to the squared size of the container)
+        self.epsilon = tolerance * np.max(self.upper - self.lower) ** 2
+        self.radius = 2 * np.sqrt(self.epsilon) + tolerance * np.max(self.upper - self.lower)  # See near_boundary
+        # The exact tests (containment, intersection) are computed in extended precision, so that rectangles touching the
+        # container are decided like Shapely's robust predicates (where np.longdouble is wider than float64)
+        self.extended_vertices = self.vertices.astype(np.longdouble)
+        self.extended_edges = self.edges.astype(np.longdouble)
+
+    def contains_points(self, points):
+        # Even-odd rule (crossings of a horizontal ray), points on the boundary are handled by the edge intersections
+        x, y = points[..., 0, None], points[..., 1, None]
+        x1, y1 = self.extended_vertices[:, 0], self.extended_vertices[:, 1]
+        x2, y2 = x1 + self.extended_edges[:, 0], y1 + self.extended_edges[:, 1]
+        straddle = (y1 > y) != (y2 > y)
+        crossings = straddle & (x < x1 + (y - y1) * (x2 - x1) / np.where(straddle, y2 - y1, 1))
+        return crossings.sum(axis=-1) % 2 == 1
+
+    def on_boundary(self, points):
+        differences = points[..., None, :] - self.extended_vertices
+        ends = self.extended_vertices + self.extended_edges
+        return on_segment(self.extended_vertices, ends, points[..., None, :], cross(self.extended_edges, differences)).any(axis=-1)
+
+    def vertices_inside(self, corners, next_corners):
+        # Container vertices strictly inside the rectangles
+        sides = cross((next_corners - corners)[:, None, :, :], self.extended_vertices[None, :, None, :] - corners[:, None, :, :])
+        return (sides > 0).all(axis=2).any(axis=1) | (sides < 0).all(axis=2).any(axis=1)
+
+    def near_boundary(self, corners):
+        # Rectangles with almost no area outside the container (at most epsilon) can only stick out if a corner is closer than
+        # the radius to the boundary of the container (a quarter of disk of that radius would be outside), or if a vertex of the
+        # container is in the rectangle : only these rectangles need the exact containment test
+        squared_distances = squared_segment_distances(corners[:, :, None, :], self.vertices, self.edges, self.squared_lengths)
+        near_corners = (squared_distances <= self.radius ** 2).any(axis=(1, 2))
+
+        # Coordinates of the container vertices along the sides of the rectangles (scaled by the lengths of the sides)
+        sides = corners[:, [1, 3]] - corners[:, :1]
+        squared_sides = np.sum(sides * sides, axis=-1)
+        coordinates = (self.vertices[None, :, None, :] - corners[:, None, :1]) * sides[:, None]
+        coordinates = coordinates[..., 0] + coordinates[..., 1]
+        margins = self.radius * np.sqrt(squared_sides)[:, None]
+        vertices_inside = ((coordinates >= -margins) & (coordinates <= squared_sides[:, None] + margins)).all(axis=2).any(axis=1)
+        return near_corners | vertices_inside | (squared_sides.min(axis=1) <= self.radius ** 2)
+
+    def intersects(self, corners):
+        # Closed sets : a rectangle corner in the container, a container vertex in the rectangle or crossing boundaries
+        corners = corners.astype(np.longdouble)
+        next_corners = following(corners)
+        crossing = segments_intersect(corners[:, :, None, :], next_corners[:, :, None, :], self.extended_vertices,
+                                      self.extended_vertices + self.extended_edges)
+        return crossing.any(axis=(1, 2)) | self.vertices_inside(corners, next_corners) | self.contains_points(corners[:, 0])
+
+    def contains(self, corners):
+        # Exact containment (boundaries may touch) : corners inside or on the container, no crossing boundaries
+        # and no container vertex inside the rectangle
+        corners = corners.astype(np.longdouble)
+        next_corners = following(corners)
+        crossing = segments_intersect(corners[:, :, None, :], next_corners[:, :, None, :], self.extended_vertices,
+                                      self.extended_vertices + self.extended_edges, proper_only=True)
+        corners_inside = (self.contains_points(corners) | self.on_boundary(corners)).all(axis=1)
+        return corners_inside & ~crossing.any(axis=(1, 2)) & ~self.vertices_inside(corners, next_corners)
+
+    def __call__(self, positions):
+        positions = np.atleast_2d(np.asarray(positions, dtype=float))
+        corners = rectangle_corners(positions)
+        fitness = np.full(len(corners), OUTSIDE_FITNESS, dtype=float)
+
+        # Bounding box rejection : only the rectangles whose bounds overlap the container's are clipped
+        candidates = np.flatnonzero(((corners.min(axis=1) <= self.upper) & (corners.max(axis=1) >= self.lower)).all(axis=1))
+        corners = corners[candidates]
+        signed_areas = positions[candidates, 2] * positions[candidates, 3]  # Counterclockwise corners when positive
+        areas = np.abs(signed_areas)
+        orientation = np.sign(signed_areas)
+
+        clipped = np.broadcast_to(self.vertices, (len(corners),) + self.vertices.shape)
+        for side in range(4):
+            clipped = clip_polygons(clipped, corners[:, side], corners[:, (side + 1) % 4], orientation)
+        intersection_areas = np.where(orientation != 0, np.abs(polygon_areas(clipped)), 0)
+
+        # Partially outside : minus the area outside the polygon. Below epsilon, areas are not precise enough : rectangles with
+        # almost no area outside are tested for containment exactly, rectangles with almost no area inside for intersection
+        # Flat rectangles are outside
+        outside_areas = np.maximum(areas - intersection_areas, 0)
+        inside = (outside_areas <= self.epsilon) & (areas > 0)
+        near = np.flatnonzero(inside)
+        if len(near):
+            near = near[self.near_boundary(corners[near])]
+        if len(near):
+            inside[near] = self.contains(corners[near])
+        intersecting = areas > 0
+        uncertain = intersecting & (intersection_areas <= self.epsilon)
+        if uncertain.any():
+            intersecting[uncertain] = self.intersects(corners[uncertain])
+        fitness[candidates] = np.where(intersecting, np.where(inside, areas, -outside_areas), OUTSIDE_FITNESS)
+        return fitness
+
+def boundary_positions(poly, num_rectangles, rng, offsets=(-1e-6, -1e-9, -1e-12, 0, 1e-12, 1e-9, 1e-6)):
+    # Rectangles with a side along an edge of the container, on its inner side (or on its outer side for a quarter of them),
+    # moved away from the edge by the offsets (positive offsets : towards the outside)
+    vertices = np.asarray(poly, dtype=float)
+    edges = np.roll(vertices, -1, axis=0) - vertices
+    orientation = np.sign(polygon_areas(vertices[None])[0])
+    edge = rng.integers(len(vertices), size=num_rectangles)
+    lengths = np.hypot(edges[edge, 0], edges[edge, 1])
+    directions = edges[edge] / lengths[:, None]
+    inward = orientation * np.column_stack((-directions[:, 1], directions[:, 0]))
+    sides = np.where(rng.random(num_rectangles) < 0.25, -1, 1)
+    offsets = rng.choice(offsets, num_rectangles)
+    anchors = vertices[edge] + rng.uniform(0.05, 0.5, (num_rectangles, 1)) * edges[edge] - offsets[:, None] * inward
+    h = rng.uniform(0.05, 0.45, num_rectangles) * lengths
+    w = orientation * sides * rng.uniform(1, 50, num_rectangles)
+    angle = np.degrees(np.arctan2(directions[:, 1], directions[:, 0])) % 360
+    return np.column_stack((anchors, w, h, angle))
+
+def validate(num_rectangles=20000, seed=0, tolerance=1e-6):
+    # Comparison of the batch objectives with the reference objective function of main.py (one Shapely polygon per rectangle)
+    # Usage : python rectangle.py
+    from main import objective_function
+
+    rng = np.random.default_rng(seed)
+    positions = np.column_stack((rng.uniform(0, 400, (num_rectangles, 2)), rng.uniform(-150, 150, (num_rectangles, 2)),
+                                 rng.uniform(0, 360, num_rectangles)))
+    positions[:num_rectangles // 4, 2:4] = rng.uniform(-20, 20, (num_rectangles // 4, 2))  # Small rectangles, often inside
+    positions[-num_rectangles // 10:, 4] = rng.choice([0, 90, 180, 270], num_rectangles // 10)  # Axis aligned
+    flat = rng.random(num_rectangles) < 0.05
+    positions[flat, rng.choice([2, 3], np.count_nonzero(flat))] = 0
+    positions = np.vstack((positions, boundary_positions(POLY, num_rectangles // 4, rng)))  # Touching or barely protruding
+    flat = np.concatenate((flat, np.zeros(num_rectangles // 4, dtype=bool)))
+    reference = np.array([objective_function(position) for position in positions])
+
+    # Flat rectangles are always outside in the batch objectives. The reference scores a few of them (zero width only) about 0,
+    # when rounding errors on the corners leave a sliver polygon with a nonzero area
+    slivers = flat & (reference != OUTSIDE_FITNESS)
+    valid = True
+    for objective in (RectangleObjective(POLY), NumpyRectangleObjective(POLY)):
+        fitness = objective(positions)
+        difference = np.max(np.abs(fitness[~slivers] - reference[~slivers]))
+        valid &= difference <= tolerance and np.all(fitness[flat] == OUTSIDE_FITNESS)
+        print(f"{type(objective).__name__:<24} max difference {difference:.3g} ({np.count_nonzero(~slivers)} rectangles, "
+              f"{np.count_nonzero(flat)} flat including {np.count_nonzero(slivers)} slivers of the reference)")
+    return valid
+
+if __name__ == "__main__":
+    raise SystemExit(0 if validate() else 1)
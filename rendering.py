@@ -0,0 +1,72 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.patches import Polygon as MatplotlibPolygon
+import matplotlib.animation as animation
+
+from rectangle import rectangle_corners
+
+def select_frames(best_position_progress, max_frames=None, decimation=1):
+    # Iterations where the best position changed (plus the first and last ones), decimated then capped to `max_frames`
+    positions = np.asarray(best_position_progress)
+    changed = np.ones(len(positions), dtype=bool)
+    changed[1:] = np.any(positions[1:] != positions[:-1], axis=1)
+    frames = np.flatnonzero(changed)[::decimation]
+    if frames[-1] != len(positions) - 1:
+        frames = np.append(frames, len(positions) - 1)
+    if max_frames is not None and len(frames) > max_frames:
+        frames = frames[np.unique(np.linspace(0, len(frames) - 1, max_frames).round().astype(int))]
+    return frames
+
+def render_best_run(optimizer, poly, best_position_progress, best_fitness_progress, path, max_frames=None, decimation=1, fps=10):
+    frames = select_frames(best_position_progress, max_frames, decimation)
+    corners = rectangle_corners(np.asarray(best_position_progress)[frames])
+    fitness = np.asarray(best_fitness_progress, dtype=float)
+    iterations = np.arange(1, len(fitness) + 1)
+    lowest_fitness = np.minimum.accumulate(fitness)
+    highest_fitness = np.maximum.accumulate(fitness)
+    poly_min = np.min(poly, axis=0)
+    poly_max = np.max(poly, axis=0)
+
+    # Artists are created once, each frame only moves the rectangle and extends the fitness curve
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_aspect('equal', adjustable='datalim')
+    ax.axis('off')
+    ax.set_title(f'{optimizer} - Best Run ')
+    ax.add_patch(MatplotlibPolygon(poly, fill=True, alpha=0.2))
+    rectangle = ax.add_patch(MatplotlibPolygon(corners[0], fill=True, color="red", alpha=1))
+
+    ax_fitness = ax.inset_axes([0, 0, 0.2, 0.2])
+    fitness_line, = ax_fitness.plot([], [])
+    ax_fitness.set_xlabel('Iteration')
+    ax_fitness.set_ylabel('Fitness')
+
+    def update_draw(i):
+        frame = frames[i]
+        rectangle.set_xy(corners[i])
+        view_min = np.minimum(poly_min, corners[i].min(axis=0))
+        view_max = np.maximum(poly_max, corners[i].max(axis=0))
+        view_min, view_max = view_min - 0.05 * (view_max - view_min), view_max + 0.05 * (view_max - view_min)
+        ax.set_xlim(view_min[0], view_max[0])
+        ax.set_ylim(view_min[1], view_max[1])
+
+        fitness_line.set_data(iterations[:frame + 1], fitness[:frame + 1])
+        ax_fitness.set_xlim(1, max(frame + 1, 2))
+        margin = max(1e-9, 0.05 * (highest_fitness[frame] - lowest_fitness[frame]))
+        ax_fitness.set_ylim(lowest_fitness[frame] - margin, highest_fitness[frame] + margin)
+        return rectangle, fitness_line
+
+    ani = animation.FuncAnimation(fig, update_draw, frames=len(frames), repeat=False, blit=False)
+    ani.save(path, writer='pillow', fps=fps)
+    return path
+
+def render_best_runs(jobs, max_workers=None):
+    # Renders several animations in parallel processes, `jobs` are the keyword arguments of `render_best_run`
+    if max_workers == 1 or len(jobs) <= 1:
+        return [render_best_run(**job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(render_best_run, **job) for job in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,24 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def run_seeds(seed, num_runs):
+    # One independent seed per run, derived from the master seed (same runs whatever the number of workers)
+    return np.random.SeedSequence(seed).spawn(num_runs)
+
+def run_optimizer(optimizer_instance, optimizer, params, seed):
+    rng = np.random.default_rng(seed)
+    return getattr(optimizer_instance, str(optimizer).lower())(params, rng)
+
+def run_many(optimizer_instance, optimizer, params, num_runs, seed=None, max_workers=None):
+    # Yields (run, result) as soon as each run completes, results are not ordered by run
+    seeds = run_seeds(seed, num_runs)
+    if max_workers == 1:
+        for run, run_seed in enumerate(seeds):
+            yield run, run_optimizer(optimizer_instance, optimizer, params, run_seed)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_optimizer, optimizer_instance, optimizer, params, run_seed): run
+                   for run, run_seed in enumerate(seeds)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
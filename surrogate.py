@@ -0,0 +1,59 @@
+import numpy as np
+
+# Surrogate pre-screening : a k-nearest-neighbour model over the positions evaluated so far predicts the fitness of new candidates,
+# only the most promising `fraction` of each batch is sent to the objective function
+class KnnSurrogate:
+    def __init__(self, fraction=0.3, k=5, capacity=5000, warmup=None, chunk_size=256):
+        self.fraction = fraction
+        self.k = k
+        self.capacity = capacity  # Most recent evaluated positions kept in the model
+        self.warmup = warmup  # Evaluated positions needed before screening, by default 2 k
+        self.chunk_size = chunk_size  # Candidates predicted at once (chunk_size x capacity distances in memory)
+        self.positions = None
+        self.fitness = None
+        self.size = 0
+        self.next = 0
+
+    def start(self, bounds):
+        # A new run starts with an empty model, distances are measured relatively to the width of the bounds
+        bounds = np.asarray(bounds, dtype=float)
+        self.lower = bounds[:, 0]
+        self.scale = np.where(bounds[:, 1] > bounds[:, 0], bounds[:, 1] - bounds[:, 0], 1.0)
+        self.positions = np.empty((self.capacity, len(bounds)))
+        self.fitness = np.empty(self.capacity)
+        self.size = 0
+        self.next = 0
+
+    def add(self, positions, fitness):
+        # Incremental refit : the evaluated positions overwrite the oldest ones once the capacity is reached
+        for position, value in zip((np.asarray(positions, dtype=float) - self.lower) / self.scale, fitness):
+            self.positions[self.next] = position
+            self.fitness[self.next] = value
+            self.next = (self.next + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def predict(self, positions):
+        positions = (np.asarray(positions, dtype=float) - self.lower) / self.scale
+        known = self.positions[:self.size]
+        known_norms = np.einsum('ij,ij->i', known, known)
+        k = min(self.k, self.size)
+        predictions = np.empty(len(positions))
+        for start in range(0, len(positions), self.chunk_size):
+            # Squared distances as |a|^2 + |b|^2 - 2 a.b, without any candidates x known x dimensions array
+            chunk = positions[start:start + self.chunk_size]
+            squared = np.einsum('ij,ij->i', chunk, chunk)[:, None] + known_norms - 2 * chunk @ known.T
+            nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+            weights = 1.0 / (np.sqrt(np.maximum(np.take_along_axis(squared, nearest, axis=1), 0)) + 1e-12)
+            predictions[start:start + self.chunk_size] = np.sum(weights * self.fitness[nearest], axis=1) / np.sum(weights, axis=1)
+        return predictions
+
+    def screen(self, positions):
+        # Mask of the candidates to evaluate for real
+        warmup = 2 * self.k if self.warmup is None else self.warmup
+        promising = np.ones(len(positions), dtype=bool)
+        if self.size < warmup or len(positions) == 0:
+            return promising
+        num_promising = max(1, int(np.ceil(self.fraction * len(positions))))
+        promising[:] = False
+        promising[np.argsort(-self.predict(positions), kind='stable')[:num_promising]] = True
+        return promising
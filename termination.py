@@ -0,0 +1,105 @@
+import numpy as np
+
+# Termination criteria, checked by the optimizers after each iteration (on top of their fixed number of iterations)
+# `check(run)` returns the name of the criterion when it fires, None otherwise
+# `remaining_evaluations(run)` returns the evaluations left before the criterion fires (None when unbounded) : the candidates
+# of the last iteration are trimmed to it, so that runs stop at exactly the same number of evaluations
+class Criterion:
+    name = 'criterion'
+
+    def start(self, run):
+        pass
+
+    def check(self, run):
+        return None
+
+    def remaining_evaluations(self, run):
+        return None
+
+class MaxEvaluations(Criterion):
+    name = 'max_evaluations'
+
+    def __init__(self, max_evaluations):
+        self.max_evaluations = max_evaluations
+
+    def check(self, run):
+        return self.name if run.evaluations >= self.max_evaluations else None
+
+    def remaining_evaluations(self, run):
+        return max(self.max_evaluations - run.evaluations, 0)
+
+class Deadline(Criterion):
+    name = 'deadline'
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def check(self, run):
+        return self.name if run.elapsed() >= self.seconds else None
+
+class TargetFitness(Criterion):
+    name = 'target_fitness'
+
+    def __init__(self, target):
+        self.target = target
+
+    def check(self, run):
+        return self.name if run.best_fitness >= self.target else None
+
+class Stagnation(Criterion):
+    # No improvement of the best fitness by more than `tolerance` during `iterations` iterations
+    name = 'stagnation'
+
+    def __init__(self, iterations, tolerance=0.0):
+        self.iterations = iterations
+        self.tolerance = tolerance
+
+    def start(self, run):
+        self.best_fitness = float('-inf')
+        self.stagnant_iterations = 0
+
+    def check(self, run):
+        if run.best_fitness > self.best_fitness + self.tolerance:
+            self.best_fitness = run.best_fitness
+            self.stagnant_iterations = 0
+        else:
+            self.stagnant_iterations += 1
+        return self.name if self.stagnant_iterations >= self.iterations else None
+
+class DiversityCollapse(Criterion):
+    # Mean standard deviation of the population, relative to the width of the bounds, below `threshold`
+    name = 'diversity_collapse'
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def check(self, run):
+        bounds = np.asarray(run.params.bounds, dtype=float)
+        diversity = np.mean(np.std(run.positions, axis=0) / (bounds[:, 1] - bounds[:, 0]))
+        return self.name if diversity < self.threshold else None
+
+class AnyOf(Criterion):
+    def __init__(self, *criteria):
+        self.criteria = criteria
+
+    def start(self, run):
+        for criterion in self.criteria:
+            criterion.start(run)
+
+    def check(self, run):
+        # Every criterion is checked so that stateful ones stay up to date
+        fired = [name for name in (criterion.check(run) for criterion in self.criteria) if name is not None]
+        return fired[0] if fired else None
+
+    def remaining_evaluations(self, run):
+        budgets = [budget for budget in (criterion.remaining_evaluations(run) for criterion in self.criteria) if budget is not None]
+        return min(budgets) if budgets else None
+
+class AllOf(AnyOf):
+    def check(self, run):
+        fired = [criterion.check(run) for criterion in self.criteria]
+        return ' and '.join(fired) if all(name is not None for name in fired) else None
+
+    def remaining_evaluations(self, run):
+        # The run goes on after the budget of one criterion until the others fire
+        return None
@@ -0,0 +1,120 @@
+# Hyperparameter tuning : racing of sampled Parameters configurations on one problem
+# Usage : python tuning.py --optimizer DE --problem rectangle --configurations 27 --output tuning.json
+import argparse
+import copy
+import json
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark import problems, optimizer_parameters, PROBLEMS
+from runner import run_seeds, run_optimizer
+from termination import MaxEvaluations
+
+# Default search spaces : (low, high) ranges are sampled uniformly, lists are choices
+SPACES = {
+    'PSO': {'psi': (0.2, 0.9), 'c1': (0.5, 2.5), 'c2': (0.5, 2.5), 'num_particles': [10, 20, 30, 50]},
+    'DE': {'scaling_factor': (0.1, 1.0), 'crossover_rate': (0.0, 1.0), 'num_population': [10, 20, 30, 50]},
+    'ABC': {'num_employed_bees': (10, 50), 'num_onlooker_bees': (10, 50), 'num_scout_bees': (10, 50), 'max_trials': (2, 30)},
+}
+
+# Hyperparameter tuning of the Parameters classes by successive halving : every configuration gets a few short runs,
+# only the best 1 / eta survive to the next rung where they get eta times more runs (and evaluations per run)
+def sample_configurations(space, num_configurations, rng):
+    # space : field -> list of values (choice) or (low, high) range (uniform, integer when both bounds are integers)
+    configurations = []
+    for _ in range(num_configurations):
+        configuration = {}
+        for field, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                configuration[field] = int(rng.integers(low, high + 1)) if isinstance(low, int) and isinstance(high, int) else float(rng.uniform(low, high))
+            else:
+                configuration[field] = values[rng.integers(len(values))]
+        configurations.append(configuration)
+    return configurations
+
+def configured_parameters(params, configuration, max_evaluations=None):
+    configured = copy.copy(params)
+    for field, value in configuration.items():
+        setattr(configured, field, value)
+    if max_evaluations is not None:
+        configured.termination = MaxEvaluations(max_evaluations)
+    return configured
+
+def evaluate_configurations(optimizer_instance, optimizer, params_list, seeds, executor):
+    # Best fitness of every run of every configuration, the same seeds are used for all the configurations
+    if executor is None:
+        return [[run_optimizer(optimizer_instance, optimizer, params, seed).best_fitness for seed in seeds] for params in params_list]
+    futures = [[executor.submit(run_optimizer, optimizer_instance, optimizer, params, seed) for seed in seeds] for params in params_list]
+    return [[future.result().best_fitness for future in configuration_futures] for configuration_futures in futures]
+
+def tune(optimizer_instance, optimizer, params, space, num_configurations=27, eta=3, min_runs=2, min_evaluations=None, max_evaluations=None,
+         seed=None, max_workers=None):
+    for field in space:
+        if not hasattr(params, field):
+            raise ValueError(f"{type(params).__qualname__} has no field {field!r}")
+    rng = np.random.default_rng(seed)
+    configurations = sample_configurations(space, num_configurations, rng)
+    rungs = []
+    runs = min_runs
+    evaluations = min_evaluations
+    executor = None if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            seeds = run_seeds(seed, runs)
+            params_list = [configured_parameters(params, configuration, evaluations) for configuration in configurations]
+            fitness = np.array(evaluate_configurations(optimizer_instance, optimizer, params_list, seeds, executor))
+            scores = fitness.mean(axis=1)
+            rungs.append({'runs': runs, 'max_evaluations': evaluations,
+                          'configurations': [dict(configuration, score=float(score)) for configuration, score in zip(configurations, scores)]})
+
+            if len(configurations) == 1:
+                break
+            survivors = np.argsort(-scores, kind='stable')[:max(1, len(configurations) // eta)]
+            configurations = [configurations[i] for i in survivors]
+            runs *= eta
+            if evaluations is not None:
+                evaluations = evaluations * eta if max_evaluations is None else min(evaluations * eta, max_evaluations)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best_fitness = fitness[0]
+    return {
+        'configuration': configurations[0],
+        'statistics': {'runs': len(best_fitness), 'mean': float(np.mean(best_fitness)), 'median': float(np.median(best_fitness)),
+                       'std': float(np.std(best_fitness)), 'min': float(np.min(best_fitness)), 'max': float(np.max(best_fitness))},
+        'rungs': rungs,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the parameters of PSO, DE or ABC by successive halving")
+    parser.add_argument('--optimizer', default='DE', choices=list(SPACES))
+    parser.add_argument('--problem', default='rectangle', choices=PROBLEMS)
+    parser.add_argument('--dimensions', type=int, default=10, help="Dimensions of the test functions")
+    parser.add_argument('--configurations', type=int, default=27)
+    parser.add_argument('--eta', type=int, default=3, help="Only the best 1 / eta configurations survive each rung")
+    parser.add_argument('--runs', type=int, default=2, help="Runs per configuration in the first rung")
+    parser.add_argument('--evaluations', type=int, default=2000, help="Evaluation budget of every run in the first rung")
+    parser.add_argument('--max-evaluations', type=int, default=30000, help="Maximum evaluation budget of a run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='tuning.json')
+    args = parser.parse_args(argv)
+
+    _, num_dimensions, objective_function, bounds, _ = next(problems([args.problem], [args.dimensions]))
+    # Smallest population of the search spaces, so that the iterations never stop a run before its evaluation budget
+    optimizer_instance, params = optimizer_parameters(args.optimizer, objective_function, bounds, num_dimensions, 10, args.max_evaluations)
+    result = tune(optimizer_instance, args.optimizer, params, SPACES[args.optimizer], args.configurations, args.eta, args.runs,
+                  args.evaluations, args.max_evaluations, args.seed, args.workers)
+
+    for rung in result['rungs']:
+        best = max(rung['configurations'], key=lambda configuration: configuration['score'])
+        print(f"{len(rung['configurations']):>4} configurations  {rung['runs']:>4} runs  {rung['max_evaluations']:>7} evaluations  best score {best['score']:.6g}")
+    print(f"Best configuration : {result['configuration']}")
+    print(f"Statistics : {result['statistics']}")
+    with open(args.output, 'w') as f:
+        json.dump(dict(result, optimizer=args.optimizer, problem=args.problem, num_dimensions=num_dimensions, seed=args.seed), f, indent=2)
+
+if __name__ == "__main__":
+    main()